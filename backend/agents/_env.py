@@ -0,0 +1,22 @@
+"""Load the backend .env file once per worker process."""
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Path: backend/agents/_env.py
+# Parent dirs: agents -> backend
+ENV_FILE = Path(__file__).parent.parent / ".env"
+
+# Set in os.environ after loading so job subprocesses, which inherit the
+# environment but re-import this module, don't re-read the file
+_LOADED_MARKER = "_DISPATCHER_AGENTS_ENV_LOADED"
+
+
+def ensure_env():
+    """Load environment variables from backend/.env (no-op after the first call)."""
+    if os.environ.get(_LOADED_MARKER):
+        return
+    # Real environment variables win over the dev .env file; keys missing from
+    # the environment are still filled in from it
+    load_dotenv(dotenv_path=ENV_FILE, override=False)
+    os.environ[_LOADED_MARKER] = "1"
@@ -0,0 +1,14 @@
+"""Event loop setup shared by the agent workers."""
+import asyncio
+import sys
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (and unavailable on Windows)
+    uvloop = None
+
+
+def use_uvloop():
+    """Make new event loops use uvloop when it is available."""
+    if uvloop is not None and sys.platform != "win32":
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
@@ -7,150 +7,246 @@ conversation history so agents can listen to each other properly.
 """
 
 import asyncio
+import json
 import logging
-from typing import Dict, Any, Optional, List
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, IO, NamedTuple, Optional, List
 
 logger = logging.getLogger(__name__)
 
+# Path: backend/agents/conversation_state.py
+# Parent dirs: agents -> backend
+RECORDINGS_DIR = Path(__file__).parent.parent / "recordings"
+
+
+@dataclass(slots=True, frozen=True)
+class StateSnapshot:
+    """Read-only snapshot of the conversation state (for debugging)."""
+    concluded: bool
+    has_dispatcher: bool
+    has_driver: bool
+    has_room: bool
+    message_count: int
+
+
+class Message(NamedTuple):
+    """A single message in the conversation history."""
+    speaker: str
+    message: str
+
+
 class ConversationState:
     """Thread-safe shared conversation state with conversation history."""
     
-    def __init__(self):
-        self._state = {
-            "concluded": False,
-            "dispatcher_session": None,
-            "driver_session": None,
-            "room": None,
-            "lock": asyncio.Lock(),
-            # NEW: Conversation history to share context between agents
-            "messages": [],  # List of {"speaker": "dispatcher|driver", "message": str}
-        }
+    # Roughly the last six exchanges; older turns stay in the saved transcript only
+    CONTEXT_WINDOW = 12
+    
+    def __init__(self, max_messages: int = CONTEXT_WINDOW):
+        self._lock = asyncio.Lock()
+        self._concluded = False
+        self._concluded_event = asyncio.Event()
+        self._dispatcher_session = None
+        self._driver_session = None
+        self._room = None
+        # Conversation history to share context between agents
+        self._messages: List[Message] = []
+        # Pre-formatted lines for the most recent messages, used as agent context
+        self._context_lines: Deque[str] = deque(maxlen=max_messages)
+        # Formatted context, rebuilt lazily after the next add_message()
+        self._context_cache: Optional[str] = None
+        self._last_activity = time.monotonic()
+        # Append-only JSONL journal of messages, so a crash doesn't lose the transcript
+        self._journal: Optional[IO[str]] = None
+        self._journal_path: Optional[Path] = None
     
     async def reset(self):
         """Reset conversation state for a new conversation."""
-        async with self._state.get("lock", asyncio.Lock()):
-            self._state["concluded"] = False
-            self._state["dispatcher_session"] = None
-            self._state["driver_session"] = None
-            self._state["room"] = None
-            self._state["messages"] = []
+        async with self._lock:
+            self._concluded = False
+            self._concluded_event.clear()
+            self._dispatcher_session = None
+            self._driver_session = None
+            self._room = None
+            self._messages = []
+            self._context_lines.clear()
+            self._context_cache = None
+            self._last_activity = time.monotonic()
+            self._close_journal()
+    
+    def start_journal(self, room_name: str) -> Path:
+        """Start streaming messages for this conversation to recordings/<room>_<timestamp>.jsonl."""
+        self._close_journal()
+        RECORDINGS_DIR.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._journal_path = RECORDINGS_DIR / f"{room_name}_{timestamp}.jsonl"
+        # Line-buffered, so each message reaches the file as soon as it is written
+        self._journal = open(self._journal_path, "a", encoding="utf-8", buffering=1)
+        return self._journal_path
+    
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
     
     async def set_concluded(self, value: bool):
         """Set conversation as concluded."""
-        async with self._state.get("lock", asyncio.Lock()):
-            self._state["concluded"] = value
+        async with self._lock:
+            self._concluded = value
+            if value:
+                self._concluded_event.set()
+            else:
+                self._concluded_event.clear()
     
-    async def is_concluded(self) -> bool:
-        """Check if conversation is concluded."""
-        async with self._state.get("lock", asyncio.Lock()):
-            return self._state["concluded"]
+    # Plain attribute reads are atomic between awaits on a single event loop,
+    # so the read-only accessors below don't take the lock.
+    @property
+    def concluded(self) -> bool:
+        """Whether the conversation is concluded."""
+        return self._concluded
+    
+    async def wait_concluded(self, timeout: Optional[float] = None):
+        """Wait for the conversation to conclude (raises asyncio.TimeoutError on timeout)."""
+        await asyncio.wait_for(self._concluded_event.wait(), timeout)
+    
+    def touch(self):
+        """Record activity (speech, transcripts) to push back the idle deadline."""
+        self._last_activity = time.monotonic()
+    
+    async def wait_concluded_or_idle(self, idle_timeout: float, timeout: float) -> str:
+        """
+        Wait until the conversation concludes, goes idle, or hits the hard timeout.
+        
+        Returns "concluded", "idle" or "timeout".
+        """
+        deadline = time.monotonic() + timeout
+        while not self._concluded_event.is_set():
+            now = time.monotonic()
+            idle_deadline = self._last_activity + idle_timeout
+            if now >= deadline:
+                return "timeout"
+            if now >= idle_deadline:
+                return "idle"
+            try:
+                await asyncio.wait_for(
+                    self._concluded_event.wait(), min(deadline, idle_deadline) - now
+                )
+            except asyncio.TimeoutError:
+                pass
+        return "concluded"
     
     async def set_dispatcher_session(self, session):
         """Store dispatcher session."""
-        async with self._state.get("lock", asyncio.Lock()):
-            self._state["dispatcher_session"] = session
+        async with self._lock:
+            self._dispatcher_session = session
     
     async def set_driver_session(self, session):
         """Store driver session."""
-        async with self._state.get("lock", asyncio.Lock()):
-            self._state["driver_session"] = session
+        async with self._lock:
+            self._driver_session = session
     
-    async def get_dispatcher_session(self):
-        """Get dispatcher session."""
-        async with self._state.get("lock", asyncio.Lock()):
-            return self._state["dispatcher_session"]
+    @property
+    def dispatcher_session(self):
+        """Dispatcher session."""
+        return self._dispatcher_session
     
-    async def get_driver_session(self):
-        """Get driver session."""
-        async with self._state.get("lock", asyncio.Lock()):
-            return self._state["driver_session"]
+    @property
+    def driver_session(self):
+        """Driver session."""
+        return self._driver_session
     
     async def set_room(self, room):
         """Store room reference."""
-        async with self._state.get("lock", asyncio.Lock()):
-            self._state["room"] = room
+        async with self._lock:
+            self._room = room
     
-    async def get_room(self):
-        """Get room reference."""
-        async with self._state.get("lock", asyncio.Lock()):
-            return self._state["room"]
+    @property
+    def room(self):
+        """Room reference."""
+        return self._room
     
     # NEW: Message/conversation history methods
     async def add_message(self, speaker: str, message: str):
         """Add a message to conversation history."""
-        async with self._state.get("lock", asyncio.Lock()):
-            self._state["messages"].append({
-                "speaker": speaker,
-                "message": message
-            })
-            logger.debug(f"[Conversation] {speaker}: {message[:100]}")
+        # Speaker labels repeat every turn, so share a single string object per label
+        speaker = sys.intern(speaker)
+        async with self._lock:
+            self._messages.append(Message(speaker, message))
+            self._context_lines.append(f"- {speaker}: {message}\n")
+            self._context_cache = None
+            self._last_activity = time.monotonic()
+            if self._journal is not None:
+                self._journal.write(json.dumps({"speaker": speaker, "message": message}) + "\n")
+            logger.debug("[Conversation] %s: %.100s", speaker, message)
     
     async def get_messages(self) -> List[Dict[str, str]]:
         """Get all messages in the conversation so far."""
-        async with self._state.get("lock", asyncio.Lock()):
-            return self._state["messages"].copy()
+        async with self._lock:
+            return [msg._asdict() for msg in self._messages]
     
     async def get_last_messages(self, count: int = 5) -> List[Dict[str, str]]:
         """Get the last N messages for context."""
-        async with self._state.get("lock", asyncio.Lock()):
-            return self._state["messages"][-count:] if self._state["messages"] else []
+        if count <= 0:
+            return []
+        async with self._lock:
+            # Slicing only copies the requested tail, not the whole history
+            return [msg._asdict() for msg in self._messages[-count:]]
     
     async def format_conversation_context(self) -> str:
-        """Format conversation history for agent context."""
-        async with self._state.get("lock", asyncio.Lock()):
-            if not self._state["messages"]:
-                return "No previous messages in this conversation yet."
-            
-            formatted = "Previous conversation:\n"
-            for msg in self._state["messages"]:
-                formatted += f"- {msg['speaker']}: {msg['message']}\n"
-            return formatted
+        """Format recent conversation history for agent context."""
+        async with self._lock:
+            if self._context_cache is None:
+                if not self._context_lines:
+                    self._context_cache = "No previous messages in this conversation yet."
+                else:
+                    self._context_cache = "Previous conversation:\n" + "".join(self._context_lines)
+            return self._context_cache
     
     async def disconnect_all(self):
         """Disconnect both agents."""
-        async with self._state.get("lock", asyncio.Lock()):
-            if self._state["dispatcher_session"]:
-                try:
-                    await self._state["dispatcher_session"].aclose()
-                except:
-                    pass
-            if self._state["driver_session"]:
-                try:
-                    await self._state["driver_session"].aclose()
-                except:
-                    pass
-    
-    def get_state_dict(self) -> Dict[str, Any]:
-        """Get current state (for debugging)."""
-        return {
-            "concluded": self._state["concluded"],
-            "has_dispatcher": self._state["dispatcher_session"] is not None,
-            "has_driver": self._state["driver_session"] is not None,
-            "has_room": self._state["room"] is not None,
-            "message_count": len(self._state["messages"])
-        }
+        async with self._lock:
+            sessions = [s for s in (self._dispatcher_session, self._driver_session) if s]
+        
+        # Close outside the lock and in parallel - each aclose() does network I/O
+        async def _close(session):
+            try:
+                await session.aclose()
+            except Exception as e:
+                logger.debug("Session close failed: %s", e)
+        
+        await asyncio.gather(*(_close(s) for s in sessions))
+    
+    def get_state_dict(self) -> StateSnapshot:
+        """Get current state (for debugging). Use dataclasses.asdict() to serialize."""
+        return StateSnapshot(
+            concluded=self._concluded,
+            has_dispatcher=self._dispatcher_session is not None,
+            has_driver=self._driver_session is not None,
+            has_room=self._room is not None,
+            message_count=len(self._messages),
+        )
     
     async def save_conversation_to_file(self, room_name: str) -> str:
         """Save conversation history to a file and return the path."""
-        from pathlib import Path
-        import json
-        from datetime import datetime
-        
-        async with self._state.get("lock", asyncio.Lock()):
-            messages = self._state["messages"].copy()
+        async with self._lock:
+            messages = [msg._asdict() for msg in self._messages]
+            journal_path = self._journal_path
+            self._close_journal()
+            self._journal_path = None
         
         # Create recordings directory if it doesn't exist
-        # Path: backend/agents/conversation_state.py
-        # Parent dirs: agents -> backend
-        recordings_dir = Path(__file__).parent.parent / "recordings"
-        recordings_dir.mkdir(exist_ok=True)
+        RECORDINGS_DIR.mkdir(exist_ok=True)
         
-        logger.info(f"[DEBUG] Recordings directory: {recordings_dir}")
+        logger.info("[DEBUG] Recordings directory: %s", RECORDINGS_DIR)
         
         # Create filename with room name and timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{room_name}_{timestamp}.json"
-        filepath = recordings_dir / filename
+        filepath = RECORDINGS_DIR / filename
         
         # Save conversation data
         conversation_data = {
@@ -160,13 +256,21 @@ class ConversationState:
             "messages": messages
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(conversation_data, f, indent=2)
+        # Serialize and write off the event loop so shutdown isn't stalled
+        await asyncio.to_thread(_write_conversation, filepath, conversation_data, journal_path)
         
-        logger.info(f"✓ Conversation saved to {filepath}")
+        logger.info("✓ Conversation saved to %s", filepath)
         return str(filepath)
 
 
+def _write_conversation(filepath: Path, conversation_data: dict, journal_path: Optional[Path]):
+    """Write the final transcript, then drop the journal it supersedes."""
+    with open(filepath, 'w') as f:
+        json.dump(conversation_data, f, indent=2)
+    if journal_path is not None:
+        journal_path.unlink(missing_ok=True)
+
+
 # Global shared state instance
 _shared_state = ConversationState()
 
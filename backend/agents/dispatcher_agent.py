@@ -1,42 +1,29 @@
 """Dispatcher Agent Worker using LiveKit Agents + OpenAI Realtime API."""
 import asyncio
 import logging
-from pathlib import Path
-from dotenv import load_dotenv
-import json
 
 from livekit import agents, rtc
-from livekit.agents import JobContext, WorkerOptions, cli
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli
 from livekit.agents.voice import AgentSession, Agent
-from livekit.agents.llm import function_tool
+from livekit.agents.llm import ChatContext, function_tool
 from livekit.plugins import openai, silero
 from conversation_state import get_shared_state
+from room_metadata import parse_room_metadata
+from _env import ensure_env
+from _loop import use_uvloop
 
 # Load environment variables from .env file in backend directory
-backend_dir = Path(__file__).parent.parent
-env_file = backend_dir / ".env"
-load_dotenv(dotenv_path=env_file, override=True)
+ensure_env()
+
+# Run the worker (and its job processes) on uvloop when available
+use_uvloop()
 
 logger = logging.getLogger("dispatcher-agent")
 logger.setLevel(logging.INFO)
 
 
-class DispatcherAgent(Agent):
-    """Tim - The Dispatcher Agent"""
-    
-    def __init__(self, custom_prompt: str = None, context: str = None, conversation_context: str = "") -> None:
-        logger.info(f"=== DISPATCHER AGENT INIT ===")
-        logger.info(f"custom_prompt type: {type(custom_prompt)}")
-        logger.info(f"custom_prompt value: {repr(custom_prompt)[:100] if custom_prompt else 'None'}")
-        logger.info(f"custom_prompt truthy: {bool(custom_prompt)}")
-        logger.info(f"context: {repr(context)[:50] if context else 'None'}")
-        
-        # Use custom prompt from UI if provided, otherwise use default
-        if custom_prompt:
-            base_instructions = custom_prompt
-            logger.info(f"✓ USING CUSTOM PROMPT (length: {len(custom_prompt)})")
-        else:
-            base_instructions = """You are Tim, a friendly and professional dispatcher at Dispatch Co. 
+# Default instructions, built once at import rather than per agent instance
+_DEFAULT_BASE_INSTRUCTIONS = """You are Tim, a friendly and professional dispatcher at Dispatch Co. 
 You are calling a driver named Chris about a load opportunity.
 
 Your goal is to:
@@ -54,51 +41,74 @@ CRITICAL INSTRUCTIONS:
 - Reference previous parts of the conversation if relevant
 - Keep responses natural and brief
 - Wait for responses before continuing"""
-        
-        # Add context if provided
-        if context:
-            base_instructions += f"\n\nContext: {context}"
-        
-        # Add conversation history for context awareness
-        if conversation_context:
-            base_instructions += f"\n\nConversation so far:\n{conversation_context}"
-        
-        base_instructions += """
+
+_TAIL_INSTRUCTIONS = """
 
 IMPORTANT: Start the conversation by greeting Chris. Say something like "Hey Chris, this is Tim from Dispatch Co. I've got a load opportunity for you."
 
 When you have successfully completed the call (got agreement from the driver, or determined they won't take it), call the end_conversation tool."""
+
+_DEFAULT_INSTRUCTIONS = _DEFAULT_BASE_INSTRUCTIONS + _TAIL_INSTRUCTIONS
+
+
+class DispatcherAgent(Agent):
+    """Tim - The Dispatcher Agent"""
+    
+    def __init__(
+        self,
+        custom_prompt: str = None,
+        context: str = None,
+        history: list = None,
+    ) -> None:
+        # Use custom prompt from UI if provided, otherwise use default
+        if custom_prompt:
+            base_instructions = custom_prompt + _TAIL_INSTRUCTIONS
+        else:
+            base_instructions = _DEFAULT_INSTRUCTIONS
         
-        logger.info(f"Final instructions length: {len(base_instructions)} chars")
-        logger.info(f"First 150 chars: {base_instructions[:150]}")
+        logger.debug(
+            "Dispatcher agent init: custom_prompt=%s, context=%s, instructions=%d chars",
+            bool(custom_prompt), bool(context), len(base_instructions)
+        )
+        
+        # Context and conversation history change per session/turn, so they go into
+        # the chat context rather than the instructions. This keeps the instructions
+        # a stable prefix the Realtime API can cache.
+        chat_ctx = ChatContext.empty()
+        if context:
+            chat_ctx.add_message(role="system", content=f"Context: {context}")
+        for msg in history or []:
+            role = "assistant" if "dispatcher" in msg["speaker"].lower() else "user"
+            chat_ctx.add_message(role=role, content=msg["message"])
         
         super().__init__(
-            instructions=base_instructions
+            instructions=base_instructions,
+            chat_ctx=chat_ctx
         )
     
     @function_tool
     async def mark_load_accepted(self, load_id: str):
         """Mark a load as accepted by the driver."""
-        logger.info(f"Load {load_id} has been accepted by driver")
+        logger.info("Load %s has been accepted by driver", load_id)
         return f"Load {load_id} marked as accepted"
     
     @function_tool
     async def mark_load_rejected(self, load_id: str, reason: str = ""):
         """Mark a load as rejected by the driver."""
-        logger.info(f"Load {load_id} has been rejected. Reason: {reason}")
+        logger.info("Load %s has been rejected. Reason: %s", load_id, reason)
         return f"Load {load_id} marked as rejected"
     
     @function_tool
     async def get_load_details(self, load_id: str):
         """Get additional details about a specific load."""
-        logger.info(f"Fetching details for load {load_id}")
+        logger.info("Fetching details for load %s", load_id)
         return f"Load {load_id}: Dallas TX to Atlanta GA, 42,000 lbs HVAC units, $2.10/mile"
     
     @function_tool
     async def end_conversation(self, summary: str = ""):
         """End the conversation - both agents should disconnect."""
-        logger.info(f"=== DISPATCHER CALLING END CONVERSATION ===")
-        logger.info(f"Summary: {summary}")
+        logger.info("=== DISPATCHER CALLING END CONVERSATION ===")
+        logger.info("Summary: %s", summary)
         
         shared_state = get_shared_state()
         await shared_state.set_concluded(True)
@@ -110,31 +120,49 @@ When you have successfully completed the call (got agreement from the driver, or
         return "Conversation ended. Disconnecting both agents."
 
 
+def _log_participants(room: rtc.Room, when: str) -> None:
+    """Log the remote participants currently in the room."""
+    participants = room.remote_participants.values()
+    logger.info("Participants %s: %d", when, len(participants))
+    for p in participants:
+        logger.info("  - %s (%s)", p.identity, p.name or "no name")
+
+
+def prewarm(proc: JobProcess):
+    """Load the Silero VAD model once per worker process, before any job is accepted."""
+    proc.userdata["vad"] = silero.VAD.load()
+
+
 async def entrypoint(ctx: JobContext):
     """
     Dispatcher agent entrypoint.
     """
-    logger.info(f"=== DISPATCHER AGENT STARTING ===")
-    logger.info(f"Room: {ctx.room.name}")
+    logger.info("=== DISPATCHER AGENT STARTING ===")
+    logger.info("Room: %s", ctx.room.name)
+    
+    # Join the room in the background while metadata is parsed and the session is built;
+    # session.start() reuses this connection instead of dialing again
+    connect_task = asyncio.create_task(ctx.connect(auto_subscribe=agents.AutoSubscribe.AUDIO_ONLY))
     
     # Read custom prompt and context from room metadata
     custom_prompt = None
     context = None
     
     try:
-        if ctx.room.metadata:
-            metadata = json.loads(ctx.room.metadata)
-            dispatcher_config = metadata.get("dispatcherAgent", {})
-            custom_prompt = dispatcher_config.get("prompt")
-            context = dispatcher_config.get("actingNotes")
-            logger.info(f"Custom dispatcher prompt loaded from room metadata")
-            if context:
-                logger.info(f"Context: {context[:100]}...")
-    except Exception as e:
-        logger.warning(f"Could not parse room metadata: {e}")
+        metadata = parse_room_metadata(ctx.room.metadata)
+        dispatcher_config = metadata.get("dispatcherAgent") or {}
+        custom_prompt = dispatcher_config.get("prompt")
+        context = dispatcher_config.get("actingNotes")
+        if custom_prompt:
+            logger.info("Custom dispatcher prompt loaded from room metadata")
+        if context:
+            logger.info("Context: %.100s...", context)
+    except (ValueError, TypeError) as e:
+        logger.warning("Could not parse room metadata: %s", e)
     
     # Create the agent session with OpenAI Realtime API
     session = AgentSession(
+        vad=ctx.proc.userdata["vad"],
         llm=openai.realtime.RealtimeModel(
             model="gpt-4o-realtime-preview-2024-12-17",
             voice="alloy",
@@ -147,45 +175,53 @@ async def entrypoint(ctx: JobContext):
     await shared_state.set_dispatcher_session(session)
     await shared_state.set_room(ctx.room)
     
-    # Start the session with the agent
-    await session.start(room=ctx.room, agent=DispatcherAgent(custom_prompt=custom_prompt, context=context))
+    # Start the session with the agent, seeded with any recent conversation history
+    history = await shared_state.get_last_messages(10)
+    agent = DispatcherAgent(custom_prompt=custom_prompt, context=context, history=history)
+    await asyncio.gather(connect_task, session.start(room=ctx.room, agent=agent))
     
     logger.info("Dispatcher agent session started")
     
-    # Log current participants
-    participants = list(ctx.room.remote_participants.values())
-    logger.info(f"Current participants in room: {len(participants)}")
-    for p in participants:
-        logger.info(f"  - {p.identity} ({p.name or 'no name'})")
-    
-    # Wait for other participants to join
-    await asyncio.sleep(2)
+    # Wait (up to 2s) for another participant to join, returning as soon as one does
+    if not ctx.room.remote_participants:
+        participant_joined = asyncio.Event()
+        
+        def _on_participant_connected(participant: rtc.RemoteParticipant):
+            participant_joined.set()
+        
+        ctx.room.on("participant_connected", _on_participant_connected)
+        try:
+            await asyncio.wait_for(participant_joined.wait(), timeout=2.0)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            ctx.room.off("participant_connected", _on_participant_connected)
     
-    # Check again after delay
-    participants = list(ctx.room.remote_participants.values())
-    logger.info(f"Participants after delay: {len(participants)}")
-    for p in participants:
-        logger.info(f"  - {p.identity} ({p.name or 'no name'})")
+    _log_participants(ctx.room, "after wait")
     
     # Generate initial greeting to start the conversation
     await session.generate_reply()
     
     logger.info("Dispatcher agent initiated conversation")
     
-    # Monitor for conversation conclusion
+    # Wait for conversation conclusion
     max_wait = 300  # 5 minute timeout
-    elapsed = 0
-    while not await shared_state.is_concluded() and elapsed < max_wait:
-        await asyncio.sleep(0.5)
-        elapsed += 0.5
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    try:
+        await shared_state.wait_concluded(max_wait)
+    except asyncio.TimeoutError:
+        logger.warning("Dispatcher reached timeout (%ds) without conclusion", max_wait)
+    elapsed = loop.time() - start_time
     
-    logger.info(f"Dispatcher concluding - closing session (waited {elapsed:.1f}s)")
+    logger.info("Dispatcher concluding - closing session (waited %.1fs)", elapsed)
 
 
 if __name__ == "__main__":
     # Worker options - no agent_name to allow multiple workers per room
     worker_opts = WorkerOptions(
         entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
     )
     
     # Run the worker with CLI
@@ -1,42 +1,30 @@
 """Driver Agent Worker using LiveKit Agents + OpenAI Realtime API."""
 import asyncio
 import logging
-from pathlib import Path
-from dotenv import load_dotenv
-import json
+from functools import lru_cache
 
 from livekit import agents, rtc
-from livekit.agents import JobContext, WorkerOptions, cli
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli
 from livekit.agents.voice import AgentSession, Agent
-from livekit.agents.llm import function_tool
+from livekit.agents.llm import ChatContext, function_tool
 from livekit.plugins import openai, silero
 from conversation_state import get_shared_state
+from room_metadata import parse_room_metadata
+from _env import ensure_env
+from _loop import use_uvloop
 
 # Load environment variables from .env file in backend directory
-backend_dir = Path(__file__).parent.parent
-env_file = backend_dir / ".env"
-load_dotenv(dotenv_path=env_file, override=True)
+ensure_env()
+
+# Run the worker (and its job processes) on uvloop when available
+use_uvloop()
 
 logger = logging.getLogger("driver-agent")
 logger.setLevel(logging.INFO)
 
 
-class DriverAgent(Agent):
-    """Chris - The Driver Agent"""
-    
-    def __init__(self, custom_prompt: str = None, context: str = None, conversation_context: str = "") -> None:
-        logger.info(f"=== DRIVER AGENT INIT ===")
-        logger.info(f"custom_prompt type: {type(custom_prompt)}")
-        logger.info(f"custom_prompt value: {repr(custom_prompt)[:100] if custom_prompt else 'None'}")
-        logger.info(f"custom_prompt truthy: {bool(custom_prompt)}")
-        logger.info(f"context: {repr(context)[:50] if context else 'None'}")
-        
-        # Use custom prompt from UI if provided, otherwise use default
-        if custom_prompt:
-            base_instructions = custom_prompt
-            logger.info(f"✓ USING CUSTOM PROMPT (length: {len(custom_prompt)})")
-        else:
-            base_instructions = """You are Chris, an experienced truck driver who is currently on the road.
+# Default instructions, built once at import rather than per agent instance
+_DEFAULT_BASE_INSTRUCTIONS = """You are Chris, an experienced truck driver who is currently on the road.
 A dispatcher named Tim from Dispatch Co is calling you about a load opportunity.
 
 Your personality:
@@ -61,49 +49,89 @@ Questions to ask (if not already answered):
 - Any special requirements?
 
 Once you have the details and they sound good, agree to take the load."""
-        
-        # Add context if provided
-        if context:
-            base_instructions += f"\n\nContext: {context}"
-        
-        # Add conversation history for context awareness
-        if conversation_context:
-            base_instructions += f"\n\nConversation so far:\n{conversation_context}"
-        
-        base_instructions += """
+
+_TAIL_INSTRUCTIONS = """
 
 When the conversation is complete (you've either accepted or rejected the load and there's nothing more to discuss), call the end_conversation tool."""
+
+_DEFAULT_INSTRUCTIONS = _DEFAULT_BASE_INSTRUCTIONS + _TAIL_INSTRUCTIONS
+
+
+# Tool lookups are deterministic per argument, so repeated calls (e.g. model
+# retries) are served from cache
+@lru_cache(maxsize=256)
+def _check_availability(date: str) -> str:
+    return f"Available on {date}"
+
+
+@lru_cache(maxsize=256)
+def _calculate_distance(origin: str, destination: str) -> str:
+    return "Approximately 800 miles"
+
+
+class DriverAgent(Agent):
+    """Chris - The Driver Agent"""
+    
+    def __init__(
+        self,
+        custom_prompt: str = None,
+        context: str = None,
+        history: list = None,
+    ) -> None:
+        # Use custom prompt from UI if provided, otherwise use default
+        if custom_prompt:
+            base_instructions = custom_prompt + _TAIL_INSTRUCTIONS
+        else:
+            base_instructions = _DEFAULT_INSTRUCTIONS
         
-        logger.info(f"Final instructions length: {len(base_instructions)} chars")
-        logger.info(f"First 150 chars: {base_instructions[:150]}")
+        logger.debug(
+            "Driver agent init: custom_prompt=%s, context=%s, instructions=%d chars",
+            bool(custom_prompt), bool(context), len(base_instructions)
+        )
+        
+        # Context and conversation history change per session/turn, so they go into
+        # the chat context rather than the instructions. This keeps the instructions
+        # a stable prefix the Realtime API can cache.
+        chat_ctx = ChatContext.empty()
+        if context:
+            chat_ctx.add_message(role="system", content=f"Context: {context}")
+        for msg in history or []:
+            role = "assistant" if "driver" in msg["speaker"].lower() else "user"
+            chat_ctx.add_message(role=role, content=msg["message"])
         
         super().__init__(
-            instructions=base_instructions
+            instructions=base_instructions,
+            chat_ctx=chat_ctx
         )
+        # Load IDs already accepted in this session; realtime retries can repeat the call
+        self._accepted_loads: set = set()
     
+    # These tools do no I/O, so they are plain functions rather than coroutines
     @function_tool
-    async def check_availability(self, date: str):
+    def check_availability(self, date: str):
         """Check driver's availability for a specific date."""
-        logger.info(f"Checking availability for {date}")
-        return f"Available on {date}"
+        logger.info("Checking availability for %s", date)
+        return _check_availability(date)
     
     @function_tool
-    async def calculate_distance(self, origin: str, destination: str):
+    def calculate_distance(self, origin: str, destination: str):
         """Calculate approximate distance between two locations."""
-        logger.info(f"Calculating distance from {origin} to {destination}")
-        return "Approximately 800 miles"
+        logger.info("Calculating distance from %s to %s", origin, destination)
+        return _calculate_distance(origin, destination)
     
     @function_tool
-    async def accept_load(self, load_id: str):
+    def accept_load(self, load_id: str):
         """Accept a load assignment."""
-        logger.info(f"Driver accepting load {load_id}")
+        if load_id not in self._accepted_loads:
+            logger.info("Driver accepting load %s", load_id)
+            self._accepted_loads.add(load_id)
         return f"Load {load_id} accepted. Ready to proceed."
     
     @function_tool
     async def end_conversation(self, summary: str = ""):
         """End the conversation - both agents should disconnect."""
-        logger.info(f"=== DRIVER CALLING END CONVERSATION ===")
-        logger.info(f"Summary: {summary}")
+        logger.info("=== DRIVER CALLING END CONVERSATION ===")
+        logger.info("Summary: %s", summary)
         
         shared_state = get_shared_state()
         await shared_state.set_concluded(True)
@@ -115,31 +143,41 @@ When the conversation is complete (you've either accepted or rejected the load a
         return "Conversation ended. Disconnecting both agents."
 
 
+def prewarm(proc: JobProcess):
+    """Load the Silero VAD model once per worker process, before any job is accepted."""
+    proc.userdata["vad"] = silero.VAD.load()
+
+
 async def entrypoint(ctx: JobContext):
     """
     Driver agent entrypoint.
     """
-    logger.info(f"=== DRIVER AGENT STARTING ===")
-    logger.info(f"Room: {ctx.room.name}")
+    logger.info("=== DRIVER AGENT STARTING ===")
+    logger.info("Room: %s", ctx.room.name)
+    
+    # Join the room in the background while metadata is parsed and the session is built;
+    # session.start() reuses this connection instead of dialing again
+    connect_task = asyncio.create_task(ctx.connect(auto_subscribe=agents.AutoSubscribe.AUDIO_ONLY))
     
     # Read custom prompt and context from room metadata
     custom_prompt = None
     context = None
     
     try:
-        if ctx.room.metadata:
-            metadata = json.loads(ctx.room.metadata)
-            driver_config = metadata.get("driverAgent", {})
-            custom_prompt = driver_config.get("prompt")
-            context = driver_config.get("actingNotes")
-            logger.info(f"Custom driver prompt loaded from room metadata")
-            if context:
-                logger.info(f"Context: {context[:100]}...")
-    except Exception as e:
-        logger.warning(f"Could not parse room metadata: {e}")
+        metadata = parse_room_metadata(ctx.room.metadata)
+        driver_config = metadata.get("driverAgent") or {}
+        custom_prompt = driver_config.get("prompt")
+        context = driver_config.get("actingNotes")
+        if custom_prompt:
+            logger.info("Custom driver prompt loaded from room metadata")
+        if context:
+            logger.info("Context: %.100s...", context)
+    except (ValueError, TypeError) as e:
+        logger.warning("Could not parse room metadata: %s", e)
     
     # Create the agent session with OpenAI Realtime API
     session = AgentSession(
+        vad=ctx.proc.userdata["vad"],
         llm=openai.realtime.RealtimeModel(
             model="gpt-4o-realtime-preview-2024-12-17",
             voice="echo",  # Different voice from dispatcher
@@ -152,34 +190,48 @@ async def entrypoint(ctx: JobContext):
     await shared_state.set_driver_session(session)
     await shared_state.set_room(ctx.room)
     
-    # Start the session with the agent
-    await session.start(room=ctx.room, agent=DriverAgent(custom_prompt=custom_prompt, context=context))
+    # Start the session with the agent, seeded with any recent conversation history
+    history = await shared_state.get_last_messages(10)
+    agent = DriverAgent(custom_prompt=custom_prompt, context=context, history=history)
+    await asyncio.gather(connect_task, session.start(room=ctx.room, agent=agent))
     
     logger.info("Driver agent session started and listening")
     
     # Log current participants
     participants = list(ctx.room.remote_participants.values())
-    logger.info(f"Current participants in room: {len(participants)}")
+    logger.info("Current participants in room: %d", len(participants))
     for p in participants:
-        logger.info(f"  - {p.identity} ({p.name or 'no name'})")
+        logger.info("  - %s (%s)", p.identity, p.name or "no name")
+    
+    # Any speech or transcript in either direction counts as activity
+    session.on("user_input_transcribed", lambda ev: shared_state.touch())
+    session.on("conversation_item_added", lambda ev: shared_state.touch())
+    shared_state.touch()
     
     # Wait for conversation to flow naturally
     # Driver will respond automatically to dispatcher's messages
-    # Keep session active and monitoring
-    max_wait = 300  # 5 minute timeout
-    elapsed = 0
-    
-    while not await shared_state.is_concluded() and elapsed < max_wait:
-        await asyncio.sleep(0.5)
-        elapsed += 0.5
+    # Give up early if the call goes quiet (e.g. the dispatcher side crashed)
+    max_wait = 300  # 5 minute hard cap
+    idle_timeout = 20
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    outcome = await shared_state.wait_concluded_or_idle(idle_timeout, max_wait)
+    if outcome == "timeout":
+        logger.warning("Driver reached timeout (%ds) without conclusion", max_wait)
+    elif outcome == "idle":
+        logger.warning("No activity for %ds - ending conversation", idle_timeout)
+        await shared_state.set_concluded(True)
+        await shared_state.disconnect_all()
+    elapsed = loop.time() - start_time
     
-    logger.info(f"Driver concluding - closing session (waited {elapsed:.1f}s)")
+    logger.info("Driver concluding - closing session (waited %.1fs)", elapsed)
 
 
 if __name__ == "__main__":
     # Worker options - no agent_name to allow multiple workers per room
     worker_opts = WorkerOptions(
         entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
     )
     
     # Run the worker with CLI
@@ -6,157 +6,176 @@ The agents use tool calling to detect when the conversation is complete and auto
 """
 
 import asyncio
+import functools
 import logging
-from livekit import rtc
-from livekit.agents import Agent, AgentSession, JobContext, WorkerOptions, cli
+import os
+import random
+from livekit import api as livekit_api, rtc
+from livekit.agents import Agent, AgentSession, AutoSubscribe, JobContext, JobProcess, WorkerOptions, cli
 from livekit.plugins import openai, silero
 from typing import Dict, Any
-import json
 
 from dispatcher_agent import DispatcherAgent
 from driver_agent import DriverAgent
 from conversation_state import get_shared_state
+from room_metadata import parse_room_metadata
+from _env import ensure_env
+from _loop import use_uvloop
+
+# Run the worker (and its job processes) on uvloop when available
+use_uvloop()
+
+# Read LiveKit API credentials once per process (used by the metadata fallback)
+ensure_env()
+LIVEKIT_URL = os.getenv("LIVEKIT_URL")
+LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
+LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _get_lk_api() -> livekit_api.LiveKitAPI:
+    """LiveKit API client shared by every lookup in this process until shutdown."""
+    return livekit_api.LiveKitAPI(url=LIVEKIT_URL, api_key=LIVEKIT_API_KEY, api_secret=LIVEKIT_API_SECRET)
+
+
+async def _close_lk_api():
+    """Close the shared LiveKit API client, if one was created."""
+    if _get_lk_api.cache_info().currsize:
+        lk_api = _get_lk_api()
+        _get_lk_api.cache_clear()
+        await lk_api.aclose()
+
+
+async def _fetch_room_metadata(room_name: str, max_attempts: int = 4) -> str:
+    """Fetch a room's metadata from the LiveKit server API ("" if unavailable)."""
+    if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
+        return ""
+    
+    lk_api = _get_lk_api()
+    for attempt in range(max_attempts):
+        # Filter server-side rather than scanning every room
+        rooms_response = await lk_api.room.list_rooms(livekit_api.ListRoomsRequest(names=[room_name]))
+        room = rooms_response.rooms[0] if rooms_response.rooms else None
+        if room is not None and room.metadata:
+            return room.metadata
+        
+        if attempt < max_attempts - 1:
+            # Exponential backoff with jitter, capped at 4s
+            delay = min(4.0, 0.25 * (2 ** attempt) * (1 + random.random()))
+            logger.info("  Room metadata not available yet, retrying in %.2fs...", delay)
+            await asyncio.sleep(delay)
+    
+    logger.warning("  Room %s metadata not found via API", room_name)
+    return ""
+
+
+async def _start_session(name: str, session: AgentSession, agent: Agent, room: rtc.Room):
+    """Start one agent session and make sure it runs with the agent's instructions."""
+    await session.start(room=room, agent=agent)
+    
+    # CRITICAL: Explicitly set session instructions after start
+    # The session should use agent instructions, but we ensure it here
+    try:
+        # Try to update session instructions if method exists
+        await session.update_instructions(agent.instructions)
+        logger.debug("✓ %s instructions updated via update_instructions()", name)
+    except AttributeError:
+        logger.debug("Note: %s update_instructions() not available, relying on agent's instructions", name)
+
+
+def prewarm(proc: JobProcess):
+    """Load the Silero VAD model once per worker process, shared by both sessions."""
+    proc.userdata["vad"] = silero.VAD.load()
+
+
 async def entrypoint(ctx: JobContext):
     """
     Multi-agent entrypoint that runs both dispatcher and driver agents in the same room.
     Uses tool calling for agents to signal conversation completion and auto-disconnect.
     """
-    logger.info(f"=== MULTI-AGENT WORKER STARTING ===")
-    logger.info(f"Room: {ctx.room.name}")
+    logger.info("=== MULTI-AGENT WORKER STARTING ===")
+    logger.info("Room: %s", ctx.room.name)
+    ctx.add_shutdown_callback(_close_lk_api)
+    
+    # Join the room in the background while metadata is fetched and the agents are built;
+    # the session starts reuse this connection instead of dialing again
+    connect_task = asyncio.create_task(ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY))
     
-    # Get room metadata - with retry for race condition
-    room_metadata = ctx.room.metadata
+    # Get room metadata. It arrives with the join response or, if the room was
+    # dispatched before its metadata was set, via a later room_metadata_changed event.
     dispatcher_config = {}
     driver_config = {}
+    metadata_timeout_seconds = 1.0
+    metadata_ready = asyncio.Event()
+    
+    def _on_metadata_changed(old_metadata: str, new_metadata: str):
+        if new_metadata:
+            metadata_ready.set()
     
-    logger.info(f"=== CHECKING ROOM METADATA ===")
-    logger.info(f"Initial metadata length: {len(room_metadata) if room_metadata else 0} bytes")
+    ctx.room.on("room_metadata_changed", _on_metadata_changed)
+    try:
+        # asyncio.wait() doesn't raise; a failed connect is reported with the session starts
+        await asyncio.wait({connect_task})
+        room_metadata = ctx.room.metadata
+        
+        logger.debug("Initial metadata length: %d bytes", len(room_metadata or ""))
+        
+        if not room_metadata:
+            try:
+                await asyncio.wait_for(metadata_ready.wait(), timeout=metadata_timeout_seconds)
+                room_metadata = ctx.room.metadata
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        ctx.room.off("room_metadata_changed", _on_metadata_changed)
     
-    # CRITICAL FIX: If metadata is empty, fetch room details from LiveKit API
-    # This handles the race condition where worker joins before metadata is propagated
-    if not room_metadata or len(room_metadata) == 0:
-        logger.info("⚠️ Metadata empty on initial join, fetching from LiveKit API...")
+    # Last resort: ask the LiveKit API, in case the update event was missed
+    if not room_metadata:
+        logger.info("⚠️ Metadata still empty, fetching from LiveKit API...")
         try:
-            import os
-            from livekit import api as livekit_api
-            from dotenv import load_dotenv
-            from pathlib import Path
-            import asyncio
-            
-            # Load env
-            backend_dir = Path(__file__).parent.parent
-            env_file = backend_dir / ".env"
-            load_dotenv(dotenv_path=env_file, override=True)
-            
-            livekit_url = os.getenv("LIVEKIT_URL")
-            api_key = os.getenv("LIVEKIT_API_KEY")
-            api_secret = os.getenv("LIVEKIT_API_SECRET")
-            
-            if all([livekit_url, api_key, api_secret]):
-                lk_api = livekit_api.LiveKitAPI(
-                    url=livekit_url,
-                    api_key=api_key,
-                    api_secret=api_secret
-                )
-                
-                # Retry loop - sometimes metadata takes a moment to propagate
-                max_retries = 5
-                retry_delay = 0.5  # seconds
-                
-                for attempt in range(max_retries):
-                    logger.info(f"Fetching rooms (attempt {attempt + 1}/{max_retries})...")
-                    
-                    # Fetch room details
-                    rooms_response = await lk_api.room.list_rooms(livekit_api.ListRoomsRequest())
-                    
-                    logger.info(f"Found {len(rooms_response.rooms)} rooms")
-                    
-                    # Access the rooms attribute of the response
-                    room_found = False
-                    for room in rooms_response.rooms:
-                        logger.info(f"  Room: {room.name}, metadata length: {len(room.metadata) if room.metadata else 0}")
-                        if room.name == ctx.room.name:
-                            room_found = True
-                            if room.metadata and len(room.metadata) > 0:
-                                room_metadata = room.metadata
-                                logger.info(f"✓ Fetched metadata from API: {len(room_metadata)} bytes")
-                                break
-                            else:
-                                logger.info(f"  Room found but metadata still empty, will retry...")
-                    
-                    if room_metadata and len(room_metadata) > 0:
-                        break  # Got metadata, exit retry loop
-                    
-                    if not room_found:
-                        logger.warning(f"  Room {ctx.room.name} not found in list yet")
-                    
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(retry_delay)
-                
-                await lk_api.aclose()
+            room_metadata = await _fetch_room_metadata(ctx.room.name)
+            if room_metadata:
+                logger.info("✓ Fetched metadata from API: %d bytes", len(room_metadata))
         except Exception as e:
-            logger.warning(f"Could not fetch room metadata from API: {e}")
-            import traceback
-            logger.warning(traceback.format_exc())
+            logger.warning("Could not fetch room metadata from API: %s", e, exc_info=True)
     
-    logger.info(f"Final metadata length: {len(room_metadata) if room_metadata else 0} bytes")
+    logger.debug("Final metadata length: %d bytes", len(room_metadata or ""))
     
     if room_metadata:
         try:
-            metadata = json.loads(room_metadata)
-            logger.info(f"✓ Metadata parsed successfully")
-            logger.info(f"Room metadata: {metadata.get('scenario', {}).get('loadId', 'unknown')}")
+            metadata = parse_room_metadata(room_metadata)
+            logger.info("✓ Metadata parsed for load %s", metadata.get("scenario", {}).get("loadId", "unknown"))
             
-            dispatcher_config = metadata.get("dispatcherAgent", {})
-            driver_config = metadata.get("driverAgent", {})
+            dispatcher_config = metadata.get("dispatcherAgent") or {}
+            driver_config = metadata.get("driverAgent") or {}
             
-            logger.info(f"Dispatcher config keys: {list(dispatcher_config.keys())}")
-            logger.info(f"Driver config keys: {list(driver_config.keys())}")
+            logger.debug("Dispatcher config keys: %s", list(dispatcher_config))
+            logger.debug("Driver config keys: %s", list(driver_config))
         except Exception as e:
-            logger.warning(f"Could not parse room metadata: {e}")
-    
-    # Note: Sessions are created first, then we'll set instructions after agent creation
-    # This is a placeholder that will be updated once we have the agent instructions
-    
-    logger.info("Starting both agent sessions...")
-    
-    # Get custom prompts if available
-    logger.info(f"=== EXTRACTING PROMPTS FROM CONFIG ===")
-    logger.info(f"dispatcher_config type: {type(dispatcher_config)}")
-    logger.info(f"dispatcher_config content: {dispatcher_config}")
-    logger.info(f"driver_config type: {type(driver_config)}")
-    logger.info(f"driver_config content: {driver_config}")
+            logger.warning("Could not parse room metadata: %s", e)
     
     custom_dispatcher_prompt = dispatcher_config.get("prompt")
     custom_dispatcher_context = dispatcher_config.get("actingNotes")
     custom_driver_prompt = driver_config.get("prompt")
     custom_driver_context = driver_config.get("actingNotes")
     
-    logger.info(f"=== CUSTOM PROMPTS ===")
-    logger.info(f"Extracted dispatcher prompt: {repr(custom_dispatcher_prompt)[:200]}")
-    logger.info(f"Dispatcher custom prompt: {'YES' if custom_dispatcher_prompt else 'NO'}")
-    if custom_dispatcher_prompt:
-        logger.info(f"  Length: {len(custom_dispatcher_prompt)} chars")
-        logger.info(f"  Preview: {custom_dispatcher_prompt[:100]}...")
-    logger.info(f"Dispatcher context: {'YES' if custom_dispatcher_context else 'NO'}")
-    
-    logger.info(f"Extracted driver prompt: {repr(custom_driver_prompt)[:200]}")
-    logger.info(f"Driver custom prompt: {'YES' if custom_driver_prompt else 'NO'}")
-    if custom_driver_prompt:
-        logger.info(f"  Length: {len(custom_driver_prompt)} chars")
-        logger.info(f"  Preview: {custom_driver_prompt[:100]}...")
-    logger.info(f"Driver context: {'YES' if custom_driver_context else 'NO'}")
-    
-    # DEBUG: Log what we're passing to agents
-    logger.info(f"=== PASSING TO AGENTS ===")
-    logger.info(f"About to create DispatcherAgent with custom_prompt={custom_dispatcher_prompt is not None}")
-    logger.info(f"About to create DriverAgent with custom_prompt={custom_driver_prompt is not None}")
+    logger.info(
+        "Custom prompts - dispatcher: %s (context: %s), driver: %s (context: %s)",
+        "YES" if custom_dispatcher_prompt else "NO",
+        "YES" if custom_dispatcher_context else "NO",
+        "YES" if custom_driver_prompt else "NO",
+        "YES" if custom_driver_context else "NO",
+    )
+    # Prompt dumps can be several KB, so only format them when debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("dispatcher_config: %s", dispatcher_config)
+        logger.debug("driver_config: %s", driver_config)
+        logger.debug("Dispatcher prompt preview: %.100s", custom_dispatcher_prompt)
+        logger.debug("Driver prompt preview: %.100s", custom_driver_prompt)
     
     # Create agent instances first to get their instructions
     dispatcher_agent = DispatcherAgent(
@@ -168,13 +187,16 @@ async def entrypoint(ctx: JobContext):
         context=custom_driver_context
     )
     
-    logger.info(f"Dispatcher agent instructions length: {len(dispatcher_agent.instructions)} chars")
-    logger.info(f"Driver agent instructions length: {len(driver_agent.instructions)} chars")
+    logger.debug(
+        "Instructions length - dispatcher: %d chars, driver: %d chars",
+        len(dispatcher_agent.instructions),
+        len(driver_agent.instructions),
+    )
     
     # Create agent sessions
     # Note: Instructions will be applied when session.start() is called with the agent
-    logger.info("Creating agent sessions...")
     dispatcher_session = AgentSession(
+        vad=ctx.proc.userdata["vad"],
         llm=openai.realtime.RealtimeModel(
             model="gpt-4o-realtime-preview-2024-12-17",
             voice="alloy",
@@ -183,6 +205,7 @@ async def entrypoint(ctx: JobContext):
     )
     
     driver_session = AgentSession(
+        vad=ctx.proc.userdata["vad"],
         llm=openai.realtime.RealtimeModel(
             model="gpt-4o-realtime-preview-2024-12-17",
             voice="echo",
@@ -190,174 +213,123 @@ async def entrypoint(ctx: JobContext):
         ),
     )
     
-    # Start dispatcher session
-    logger.info("Starting dispatcher session...")
-    await dispatcher_session.start(
-        room=ctx.room, 
-        agent=dispatcher_agent
+    # Start both sessions concurrently; each start() does its own RTC + Realtime handshake
+    logger.info("Starting dispatcher and driver sessions...")
+    results = await asyncio.gather(
+        connect_task,
+        _start_session("Dispatcher", dispatcher_session, dispatcher_agent, ctx.room),
+        _start_session("Driver", driver_session, driver_agent, ctx.room),
+        return_exceptions=True,
     )
-    logger.info("✓ Dispatcher agent session started")
-    
-    # CRITICAL: Explicitly set session instructions after start
-    # The session should use agent instructions, but we ensure it here
-    logger.info("Ensuring dispatcher session uses agent instructions...")
-    try:
-        # Try to update session instructions if method exists
-        await dispatcher_session.update_instructions(dispatcher_agent.instructions)
-        logger.info("✓ Dispatcher instructions updated via update_instructions()")
-    except AttributeError:
-        logger.info("Note: update_instructions() not available, relying on agent's instructions")
-    
-    # Start driver session
-    logger.info("Starting driver session...")
-    await driver_session.start(
-        room=ctx.room, 
-        agent=driver_agent
-    )
-    logger.info("✓ Driver agent session started")
-    
-    # CRITICAL: Explicitly set session instructions after start
-    logger.info("Ensuring driver session uses agent instructions...")
-    try:
-        # Try to update session instructions if method exists
-        await driver_session.update_instructions(driver_agent.instructions)
-        logger.info("✓ Driver instructions updated via update_instructions()")
-    except AttributeError:
-        logger.info("Note: update_instructions() not available, relying on agent's instructions")
+    failed = False
+    for name, result in zip(("Room connection", "Dispatcher", "Driver"), results):
+        if isinstance(result, BaseException):
+            logger.error("%s failed to start", name, exc_info=result)
+            failed = True
+    if failed:
+        raise RuntimeError("Failed to start agent sessions")
+    logger.info("✓ Dispatcher and driver agent sessions started")
     
     # Log current participants
     participants = list(ctx.room.remote_participants.values())
-    logger.info(f"Current participants in room: {len(participants)}")
+    logger.info("Current participants in room: %d", len(participants))
     for p in participants:
-        logger.info(f"  - {p.identity} ({p.name or 'no name'})")
+        logger.debug("  - %s (%s)", p.identity, p.name or "no name")
     
     logger.info("Multi-agent worker ready - both agents active and listening")
     
     # Reset shared state for this new conversation
     shared_state = get_shared_state()
     await shared_state.reset()
+    shared_state.start_journal(ctx.room.name)
     logger.info("✓ Conversation state reset for new conversation")
     
+    max_duration_seconds = 600  # 10 minute safety timeout
+    reply_timeout_seconds = 30  # bound a single stalled reply
+    turn_tasks = set()
+    
+    async def _take_turn(name: str, session: AgentSession, user_input: str = None):
+        """Have one agent reply; a stalled or failed reply ends the conversation."""
+        try:
+            # The peer's line goes in as user input, so it lands in this session's
+            # chat context and the agent's own instructions (persona, acting notes,
+            # end_conversation rule) stay in force for the reply
+            if user_input is None:
+                handle = session.generate_reply()
+            else:
+                handle = session.generate_reply(user_input=user_input)
+            try:
+                await asyncio.wait_for(handle.wait_for_playout(), timeout=reply_timeout_seconds)
+            except asyncio.TimeoutError:
+                handle.interrupt()
+                logger.warning("⚠️ %s reply stalled for %ds - ending conversation", name, reply_timeout_seconds)
+                await shared_state.set_concluded(True)
+        except Exception:
+            logger.exception("❌ %s failed to speak", name)
+            await shared_state.set_concluded(True)
+    
+    def _spawn_turn(name: str, session: AgentSession, user_input: str = None):
+        task = asyncio.create_task(_take_turn(name, session, user_input))
+        turn_tasks.add(task)
+        task.add_done_callback(turn_tasks.discard)
+    
+    async def _hand_off(speaker: str, text: str, next_name: str, next_session: AgentSession):
+        """Record a finished turn and let the other agent answer right away."""
+        await shared_state.add_message(speaker, text)
+        if shared_state.concluded:
+            return
+        _spawn_turn(next_name, next_session, f"{speaker}: {text}")
+    
+    def _on_turn_committed(speaker: str, next_name: str, next_session: AgentSession):
+        # Session events fire once an agent's reply is committed to the chat history,
+        # so the next turn starts as soon as the previous one finishes playing out.
+        def _handler(ev):
+            item = ev.item
+            if getattr(item, "role", None) != "assistant":
+                return
+            task = asyncio.create_task(_hand_off(speaker, item.text_content or "", next_name, next_session))
+            turn_tasks.add(task)
+            task.add_done_callback(turn_tasks.discard)
+        return _handler
+    
+    on_dispatcher_turn = _on_turn_committed("Tim (Dispatcher)", "Driver", driver_session)
+    on_driver_turn = _on_turn_committed("Chris (Driver)", "Dispatcher", dispatcher_session)
+    dispatcher_session.on("conversation_item_added", on_dispatcher_turn)
+    driver_session.on("conversation_item_added", on_driver_turn)
+    
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    
     # Dispatcher initiates the first reply
     logger.info("Dispatcher initiating conversation...")
-    try:
-        await dispatcher_session.generate_reply()
-        logger.info("✓ Dispatcher spoke successfully")
-        # Capture dispatcher's initial greeting
-        await shared_state.add_message("Tim (Dispatcher)", "Initiated greeting")
-    except Exception as e:
-        logger.error(f"❌ Dispatcher failed to speak: {e}")
-        import traceback
-        traceback.print_exc()
-        return
+    _spawn_turn("Dispatcher", dispatcher_session)
     
     logger.info("Starting natural conversation flow - agents will conclude when ready...")
     
-    # shared_state already initialized above
-    turn_count = 0
-    max_duration_seconds = 600  # 10 minute safety timeout
-    start_time = asyncio.get_event_loop().time()
-    
-    # Keep agents conversing naturally until they decide to end
-    while not await shared_state.is_concluded():
-        # Check safety timeout
-        elapsed = asyncio.get_event_loop().time() - start_time
-        if elapsed > max_duration_seconds:
-            logger.warning(f"⚠️ Conversation reached safety timeout ({max_duration_seconds}s)")
-            break
-        
-        # Wait a bit for response processing
-        await asyncio.sleep(2)
-        
-        # Driver responds
-        logger.info(f"Turn {turn_count + 1}: Driver generating response...")
-        try:
-            # Get conversation context for driver awareness
-            conversation_context = await shared_state.format_conversation_context()
-            
-            # Create fresh driver agent instance with current conversation context
-            updated_driver_agent = DriverAgent(
-                custom_prompt=custom_driver_prompt,
-                context=custom_driver_context,
-                conversation_context=conversation_context
-            )
-            
-            # Update the session with new agent instance AND update LLM instructions
-            driver_session._agent = updated_driver_agent
-            # CRITICAL: Also update the LLM instructions to reflect the new context
-            if hasattr(driver_session._llm, 'update_instructions'):
-                driver_session._llm.update_instructions(updated_driver_agent.instructions)
-            elif hasattr(driver_session._llm, '_instructions'):
-                driver_session._llm._instructions = updated_driver_agent.instructions
-            
-            await driver_session.generate_reply()
-            logger.info(f"✓ Driver spoke")
-            # Capture driver response
-            await shared_state.add_message("Chris (Driver)", "Responded to dispatcher")
-            turn_count += 1
-        except Exception as e:
-            logger.error(f"❌ Driver response error: {e}")
-            import traceback
-            traceback.print_exc()
-            break
-        
-        # Check if agents concluded
-        if await shared_state.is_concluded():
-            logger.info("✓ Agent signaled conversation conclusion")
-            break
-        
-        await asyncio.sleep(2)
-        
-        # Dispatcher responds
-        logger.info(f"Turn {turn_count + 1}: Dispatcher generating response...")
-        try:
-            # Get conversation context for dispatcher awareness
-            conversation_context = await shared_state.format_conversation_context()
-            
-            # Create fresh dispatcher agent instance with current conversation context
-            updated_dispatcher_agent = DispatcherAgent(
-                custom_prompt=custom_dispatcher_prompt,
-                context=custom_dispatcher_context,
-                conversation_context=conversation_context
-            )
-            
-            # Update the session with new agent instance AND update LLM instructions
-            dispatcher_session._agent = updated_dispatcher_agent
-            # CRITICAL: Also update the LLM instructions to reflect the new context
-            if hasattr(dispatcher_session._llm, 'update_instructions'):
-                dispatcher_session._llm.update_instructions(updated_dispatcher_agent.instructions)
-            elif hasattr(dispatcher_session._llm, '_instructions'):
-                dispatcher_session._llm._instructions = updated_dispatcher_agent.instructions
-            
-            await dispatcher_session.generate_reply()
-            logger.info(f"✓ Dispatcher spoke")
-            # Capture dispatcher response
-            await shared_state.add_message("Tim (Dispatcher)", "Responded to driver")
-            turn_count += 1
-        except Exception as e:
-            logger.error(f"❌ Dispatcher response error: {e}")
-            import traceback
-            traceback.print_exc()
-            break
-        
-        # Check if agents concluded
-        if await shared_state.is_concluded():
-            logger.info("✓ Agent signaled conversation conclusion")
-            break
-        
-        # Log progress every 10 turns
-        if turn_count % 10 == 0:
-            logger.info(f"📊 Conversation ongoing... {turn_count} turns so far")
+    # Turns are driven by the session events above; just wait for an agent to conclude
+    try:
+        await shared_state.wait_concluded(timeout=max_duration_seconds)
+        logger.info("✓ Agent signaled conversation conclusion")
+    except asyncio.TimeoutError:
+        logger.warning("⚠️ Conversation reached safety timeout (%ds)", max_duration_seconds)
+    finally:
+        # Stop chaining turns and cancel anything still in flight
+        dispatcher_session.off("conversation_item_added", on_dispatcher_turn)
+        driver_session.off("conversation_item_added", on_driver_turn)
+        for task in list(turn_tasks):
+            task.cancel()
+        await asyncio.gather(*turn_tasks, return_exceptions=True)
     
-    elapsed_time = asyncio.get_event_loop().time() - start_time
-    logger.info(f"✅ Conversation completed: {turn_count} turns in {elapsed_time:.1f}s")
+    turn_count = len(await shared_state.get_messages())
+    elapsed_time = loop.time() - start_time
+    logger.info("✅ Conversation completed: %d turns in %.1fs", turn_count, elapsed_time)
     
     # Save conversation to file for later retrieval
     try:
         conversation_file = await shared_state.save_conversation_to_file(ctx.room.name)
-        logger.info(f"✓ Conversation saved: {conversation_file}")
+        logger.info("✓ Conversation saved: %s", conversation_file)
     except Exception as e:
-        logger.warning(f"⚠️ Could not save conversation: {e}")
+        logger.warning("⚠️ Could not save conversation: %s", e)
     
     logger.info("Multi-agent worker conversation complete")
 
@@ -366,6 +338,11 @@ if __name__ == "__main__":
     # Single worker that manages both agents
     worker_opts = WorkerOptions(
         entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        # Keep warm processes (VAD already loaded) ready, and stop taking rooms
+        # before the host is saturated - each room runs two realtime sessions
+        num_idle_processes=2,
+        load_threshold=0.75,
     )
     
     # Run the worker with CLI
@@ -0,0 +1,24 @@
+"""Room metadata parsing shared by the agent workers."""
+from functools import lru_cache
+from typing import Any, Dict
+
+try:
+    import orjson as _json
+except ImportError:  # orjson is optional; stdlib json is a drop-in for loads()
+    import json as _json
+
+
+@lru_cache(maxsize=32)
+def parse_room_metadata(raw: str) -> Dict[str, Any]:
+    """
+    Parse room metadata JSON, cached by the raw metadata string.
+    
+    The returned dict is shared between callers and must not be mutated.
+    Raises ValueError if the metadata is not a JSON object.
+    """
+    if not raw or raw == "{}":
+        return {}
+    metadata = _json.loads(raw)
+    if not isinstance(metadata, dict):
+        raise ValueError("Room metadata is not a JSON object")
+    return metadata
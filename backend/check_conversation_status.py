@@ -3,10 +3,15 @@ Quick script to check conversation status from the saved JSON files.
 Shows the latest conversation and how many turns it has.
 """
 
-import json
+import os
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson as _json
+except ImportError:  # orjson is optional; stdlib json.loads() also accepts bytes
+    import json as _json
+
 def check_status():
     recordings_dir = Path(__file__).parent / "recordings"
     
@@ -14,19 +19,23 @@ def check_status():
         print("[X] No recordings directory found")
         return
     
-    # Find all conversation JSON files
-    json_files = sorted(recordings_dir.glob("conv_*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    # Find the newest conversation JSON file in a single directory pass
+    with os.scandir(recordings_dir) as entries:
+        latest_entry = max(
+            (e for e in entries if e.name.startswith("conv_") and e.name.endswith(".json")),
+            key=lambda e: e.stat().st_mtime,
+            default=None,
+        )
     
-    if not json_files:
+    if latest_entry is None:
         print("[ ] No conversation recordings found yet")
         return
     
     # Show latest conversation
-    latest = json_files[0]
+    latest = Path(latest_entry.path)
     
     try:
-        with open(latest, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _json.loads(latest.read_bytes())
         
         room_name = data.get("room_name", "Unknown")
         timestamp = data.get("timestamp", "Unknown")
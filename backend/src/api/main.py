@@ -1,4 +1,5 @@
 """Main FastAPI application."""
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
@@ -10,12 +11,34 @@ backend_dir = Path(__file__).parent.parent.parent
 env_file = backend_dir / ".env"
 load_dotenv(dotenv_path=env_file)
 
+from livekit import api
+from .responses import ORJSONResponse
 from .routes import rooms
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create a single pooled LiveKit API client for the app's lifetime."""
+    app.state.lk_api = None
+    if rooms._LIVEKIT_CONFIGURED:
+        app.state.lk_api = api.LiveKitAPI(
+            url=rooms.LIVEKIT_URL,
+            api_key=rooms.LIVEKIT_API_KEY,
+            api_secret=rooms.LIVEKIT_API_SECRET
+        )
+    try:
+        yield
+    finally:
+        if app.state.lk_api is not None:
+            await app.state.lk_api.aclose()
+
+
 app = FastAPI(
     title="Dispatcher Agents API",
     description="LiveKit Voice Agent Conversation System",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Register routers
@@ -1,38 +1,41 @@
 """Conversation API routes."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from datetime import datetime
+from functools import lru_cache
 import os
-from ...models.schemas import (
-    ConversationRequest,
-    ConversationResponse,
-    ConversationTurn as ConversationTurnSchema
-)
+from ...models.schemas import ConversationRequest, ConversationResponse
+from ..responses import ORJSONResponse
 from ...services.llm_service import LLMService
 from ...services.conversation_service import ConversationService
 
 router = APIRouter(prefix="/api/v1/conversations", tags=["conversations"])
 
 
+@lru_cache(maxsize=1)
+def get_conversation_service() -> ConversationService:
+    """Process-wide ConversationService, so the LLM HTTP client is pooled across requests."""
+    # Get API key from environment
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        # Raising keeps lru_cache from caching, so a later-configured key is picked up
+        raise HTTPException(
+            status_code=500,
+            detail="OPENROUTER_API_KEY not configured on server"
+        )
+    return ConversationService(LLMService(api_key=api_key))
+
+
 @router.post("/generate", response_model=ConversationResponse)
-async def generate_conversation(request: ConversationRequest):
+async def generate_conversation(
+    request: ConversationRequest,
+    conversation_service: ConversationService = Depends(get_conversation_service),
+):
     """
     Generate a conversation between dispatcher and driver agents.
     
     Uses OpenRouter API for LLM calls and Langfuse for observability.
     """
     try:
-        # Get API key from environment
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            raise HTTPException(
-                status_code=500,
-                detail="OPENROUTER_API_KEY not configured on server"
-            )
-        
-        # Initialize services
-        llm_service = LLMService(api_key=api_key)
-        conversation_service = ConversationService(llm_service)
-        
         # Generate conversation
         conversation_turns = await conversation_service.generate_conversation(
             scenario=request.scenario.model_dump(),
@@ -41,21 +44,22 @@ async def generate_conversation(request: ConversationRequest):
             max_turns=20
         )
         
-        # Convert to response format
-        transcript = [
-            ConversationTurnSchema(
-                speaker=turn.speaker,
-                text=turn.text,
-                timestamp=turn.timestamp.isoformat()
-            )
-            for turn in conversation_turns
-        ]
-        
-        return ConversationResponse(
-            conversationId=datetime.now().isoformat(),
-            transcript=transcript,
-            audioUrl=None  # Will be implemented in later milestones
-        )
+        # Build the ConversationResponse shape as plain dicts and let orjson render it;
+        # the turns come from our own service, so Pydantic validation/serialization is
+        # skipped (response_model still documents the shape; the request is still validated)
+        response = {
+            "conversationId": datetime.now().isoformat(),
+            "transcript": [
+                {
+                    "speaker": turn.speaker,
+                    "text": turn.text,
+                    "timestamp": turn.timestamp.isoformat()
+                }
+                for turn in conversation_turns
+            ],
+            "audioUrl": None  # Will be implemented in later milestones
+        }
+        return ORJSONResponse(content=response)
     
     except HTTPException:
         raise
@@ -1,15 +1,32 @@
 """Room management API routes for LiveKit."""
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+import aiohttp
 import os
 import json
+import logging
+import shutil
+import time
 from pathlib import Path
 from livekit import api
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+try:
+    import orjson
+    
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+    
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 # Load environment variables from .env file in backend directory
 # Path: backend/src/api/routes/rooms.py
 # Parent dirs: routes -> api -> src -> backend
@@ -18,11 +35,138 @@ backend_dir = Path(__file__).parent.parent.parent.parent
 env_file = backend_dir / ".env"
 load_dotenv(dotenv_path=env_file)
 
+# LiveKit credentials, read once at import
+LIVEKIT_URL = os.getenv("LIVEKIT_URL")
+LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
+LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
+_LIVEKIT_CONFIGURED = all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET])
+
+# When served behind nginx, set USE_XACCEL_REDIRECT=1 to let nginx send audio files itself:
+#   location /internal-audio/ { internal; alias <backend>/recordings/audio/; }
+USE_XACCEL_REDIRECT = os.getenv("USE_XACCEL_REDIRECT", "").lower() in ("1", "true", "yes")
+XACCEL_AUDIO_PREFIX = os.getenv("XACCEL_AUDIO_PREFIX", "/internal-audio/")
+
+RECORDINGS_DIR = backend_dir / "recordings"
+AUDIO_DIR = RECORDINGS_DIR / "audio"
+AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+
 print(f"[INIT] rooms.py loaded from: {Path(__file__)}")
 print(f"[INIT] Backend directory: {backend_dir}")
-print(f"[INIT] Recordings directory will be: {backend_dir / 'recordings'}")
+print(f"[INIT] Recordings directory will be: {RECORDINGS_DIR}")
 
 router = APIRouter(prefix="/api/v1/rooms", tags=["rooms"])
+logger = logging.getLogger(__name__)
+
+
+# Signed observer JWTs by (api_key, room_name) -> (token, reuse deadline).
+# Tokens are valid for 2h; a cached one is only handed out for its first 15 minutes.
+_OBSERVER_TOKEN_TTL = timedelta(hours=2)
+_OBSERVER_TOKEN_REUSE_SECONDS = 15 * 60
+_jwt_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+
+def _observer_token(api_key: str, api_secret: str, room_name: str) -> str:
+    """Return a subscribe-only JWT for the room, reusing a recently signed one."""
+    now = time.monotonic()
+    key = (api_key, room_name)
+    cached = _jwt_cache.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    token = api.AccessToken(api_key, api_secret)
+    token.with_identity("observer") \
+         .with_name("Observer") \
+         .with_grants(api.VideoGrants(
+             room_join=True,
+             room=room_name,
+             can_publish=False,  # Observer can't publish
+             can_subscribe=True  # Observer can subscribe to audio
+         ))
+    
+    # Set token expiry
+    token.ttl = _OBSERVER_TOKEN_TTL
+    
+    # Generate JWT token
+    jwt_token = token.to_jwt()
+    
+    # Drop expired entries so the cache doesn't grow with every room ever created
+    for stale_key in [k for k, (_, deadline) in _jwt_cache.items() if deadline <= now]:
+        del _jwt_cache[stale_key]
+    _jwt_cache[key] = (jwt_token, now + _OBSERVER_TOKEN_REUSE_SECONDS)
+    return jwt_token
+
+
+# Transcript responses by room -> (file mtime, response); saved conversations don't
+# change, so a matching mtime means the cached response is still valid
+_TRANSCRIPT_CACHE_SIZE = 256
+_transcript_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+_DISPATCHER_KEYS = ("dispatcher", "tim")
+_DRIVER_KEYS = ("driver", "chris")
+
+
+def _classify_speaker(speaker: str) -> str:
+    """Map a recorded speaker label to its UI display name."""
+    lowered = speaker.lower()
+    if any(key in lowered for key in _DISPATCHER_KEYS):
+        return "Dispatcher"
+    if any(key in lowered for key in _DRIVER_KEYS):
+        return "Driver"
+    return speaker
+
+
+class _AudioFileResponse(FileResponse):
+    """FileResponse with 1MB chunks (Starlette's default is 64KB) for multi-MB recordings."""
+    chunk_size = 1 << 20
+
+
+def _latest_file(directory: Path, prefix: str, suffix: str) -> Optional[Tuple[Path, float]]:
+    """Return (path, mtime) of the newest file named prefix*suffix, in one directory pass."""
+    best_path = None
+    best_mtime = -1.0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.name.endswith(suffix):
+                mtime = entry.stat().st_mtime
+                if mtime > best_mtime:
+                    best_mtime = mtime
+                    best_path = entry.path
+    if best_path is None:
+        return None
+    return Path(best_path), best_mtime
+
+
+def _save_upload(src: BinaryIO, filepath: Path) -> int:
+    """Copy an uploaded file to disk in 1MB chunks and return its size in bytes."""
+    with open(filepath, "wb") as f:
+        shutil.copyfileobj(src, f, 1 << 20)
+        return f.tell()
+
+
+def get_lk_api(request: Request) -> api.LiveKitAPI:
+    """Dependency returning the app-wide LiveKit API client created in main.lifespan()."""
+    if not _LIVEKIT_CONFIGURED:
+        missing = []
+        if not LIVEKIT_URL:
+            missing.append("LIVEKIT_URL")
+        if not LIVEKIT_API_KEY:
+            missing.append("LIVEKIT_API_KEY")
+        if not LIVEKIT_API_SECRET:
+            missing.append("LIVEKIT_API_SECRET")
+        
+        raise HTTPException(
+            status_code=500,
+            detail=f"LiveKit credentials not configured. Missing: {', '.join(missing)}"
+        )
+    
+    lk_api = getattr(request.app.state, "lk_api", None)
+    if lk_api is None:
+        raise HTTPException(
+            status_code=500,
+            detail="LiveKit API client not initialized"
+        )
+    return lk_api
 
 
 class Scenario(BaseModel):
@@ -66,7 +210,7 @@ class RoomInfo(BaseModel):
 
 
 @router.post("/create", response_model=RoomInfo)
-async def create_room(request: CreateRoomRequest):
+async def create_room(request: CreateRoomRequest, lk_api: api.LiveKitAPI = Depends(get_lk_api)):
     """
     Create a LiveKit room for the voice conversation.
     
@@ -74,53 +218,17 @@ async def create_room(request: CreateRoomRequest):
     The agent workers will be dispatched separately.
     """
     try:
-        # Get LiveKit credentials
-        livekit_url = os.getenv("LIVEKIT_URL")
-        api_key = os.getenv("LIVEKIT_API_KEY")
-        api_secret = os.getenv("LIVEKIT_API_SECRET")
-        
-        if not all([livekit_url, api_key, api_secret]):
-            missing = []
-            if not livekit_url:
-                missing.append("LIVEKIT_URL")
-            if not api_key:
-                missing.append("LIVEKIT_API_KEY")
-            if not api_secret:
-                missing.append("LIVEKIT_API_SECRET")
-            
-            raise HTTPException(
-                status_code=500,
-                detail=f"LiveKit credentials not configured. Missing: {', '.join(missing)}"
-            )
-        
         # Generate unique room name
         conversation_id = f"conv_{request.scenario.loadId}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         room_name = conversation_id
         
-        # Create LiveKit API client
-        lk_api = api.LiveKitAPI(
-            url=livekit_url,
-            api_key=api_key,
-            api_secret=api_secret
-        )
-        
         # Prepare metadata as JSON string
-        print(f"\n[ROOMS API] Creating room with metadata:")
-        print(f"  Request scenario: {request.scenario}")
-        print(f"  Request dispatcherAgent: {request.dispatcherAgent}")
-        print(f"  Request driverAgent: {request.driverAgent}")
-        
         metadata_dict = {
             "scenario": request.scenario.model_dump(),
             "dispatcherAgent": request.dispatcherAgent.model_dump(),
             "driverAgent": request.driverAgent.model_dump()
         }
-        metadata_json = json.dumps(metadata_dict)
-        
-        print(f"  Metadata dict: {metadata_dict}")
-        print(f"  Metadata JSON length: {len(metadata_json)} bytes")
-        print(f"  Dispatcher config: {metadata_dict.get('dispatcherAgent')}")
-        print(f"  Driver config: {metadata_dict.get('driverAgent')}")
+        metadata_json = _json_dumps(metadata_dict)
         
         # Create the room
         room = await lk_api.room.create_room(
@@ -132,32 +240,15 @@ async def create_room(request: CreateRoomRequest):
             )
         )
         
-        print(f"  Room created with metadata length: {len(room.metadata) if room.metadata else 0} bytes")
-        print(f"  Room metadata: {room.metadata[:200] if room.metadata else 'EMPTY'}")
+        logger.debug("[ROOMS API] Created room %s with %d bytes of metadata", room_name, len(room.metadata or ""))
         
         # Generate token for frontend (observer role)
-        token = api.AccessToken(api_key, api_secret)
-        token.with_identity("observer") \
-             .with_name("Observer") \
-             .with_grants(api.VideoGrants(
-                 room_join=True,
-                 room=room_name,
-                 can_publish=False,  # Observer can't publish
-                 can_subscribe=True  # Observer can subscribe to audio
-             ))
-        
-        # Set token expiry
-        token.ttl = timedelta(hours=2)
-        
-        # Generate JWT token
-        jwt_token = token.to_jwt()
-        
-        await lk_api.aclose()
+        jwt_token = _observer_token(LIVEKIT_API_KEY, LIVEKIT_API_SECRET, room_name)
         
         return RoomInfo(
             roomName=room_name,
             roomToken=jwt_token,
-            livekitUrl=livekit_url,
+            livekitUrl=LIVEKIT_URL,
             conversationId=conversation_id
         )
     
@@ -174,42 +265,24 @@ async def create_room(request: CreateRoomRequest):
 
 
 @router.get("/{room_name}/status")
-async def get_room_status(room_name: str):
+async def get_room_status(room_name: str, lk_api: api.LiveKitAPI = Depends(get_lk_api)):
     """Get the status of a room."""
     try:
-        livekit_url = os.getenv("LIVEKIT_URL")
-        api_key = os.getenv("LIVEKIT_API_KEY")
-        api_secret = os.getenv("LIVEKIT_API_SECRET")
-        
-        if not all([livekit_url, api_key, api_secret]):
-            raise HTTPException(
-                status_code=500,
-                detail="LiveKit credentials not configured"
-            )
-        
-        lk_api = api.LiveKitAPI(
-            url=livekit_url,
-            api_key=api_key,
-            api_secret=api_secret
-        )
-        
         # List participants in the room
         participants = await lk_api.room.list_participants(
             api.ListParticipantsRequest(room=room_name)
         )
         
-        await lk_api.aclose()
-        
         return {
             "roomName": room_name,
-            "participantCount": len(participants),
+            "participantCount": len(participants.participants),
             "participants": [
                 {
                     "identity": p.identity,
                     "name": p.name,
                     "state": str(p.state)
                 }
-                for p in participants
+                for p in participants.participants
             ]
         }
     
@@ -224,7 +297,7 @@ async def get_room_status(room_name: str):
 
 
 @router.post("/{room_name}/dispatch-agents")
-async def dispatch_agents(room_name: str):
+async def dispatch_agents(room_name: str, request: Request):
     """
     Dispatch agent workers to the room.
     
@@ -234,26 +307,15 @@ async def dispatch_agents(room_name: str):
     """
     try:
         # Check if room exists and get participant count
-        livekit_url = os.getenv("LIVEKIT_URL")
-        api_key = os.getenv("LIVEKIT_API_KEY")
-        api_secret = os.getenv("LIVEKIT_API_SECRET")
-        
-        if all([livekit_url, api_key, api_secret]):
-            lk_api = api.LiveKitAPI(
-                url=livekit_url,
-                api_key=api_key,
-                api_secret=api_secret
-            )
-            
+        lk_api = getattr(request.app.state, "lk_api", None)
+        if lk_api is not None:
             try:
                 participants = await lk_api.room.list_participants(
                     api.ListParticipantsRequest(room=room_name)
                 )
-                participant_count = len(participants)
-            except:
+                participant_count = len(participants.participants)
+            except (api.TwirpError, aiohttp.ClientError, ConnectionError):
                 participant_count = 0
-            
-            await lk_api.aclose()
         else:
             participant_count = 0
         
@@ -282,76 +344,66 @@ async def get_transcript(room_name: str):
     This retrieves the saved JSON file with all conversation messages.
     """
     try:
-        # Recordings directory inside backend
-        recordings_dir = backend_dir / "recordings"
+        logger.debug("[TRANSCRIPT] Searching for room %s in %s", room_name, RECORDINGS_DIR)
         
-        print(f"\n[TRANSCRIPT] Searching for room: {room_name}")
-        print(f"[TRANSCRIPT] Directory: {recordings_dir}")
-        
-        if not recordings_dir.exists():
-            print(f"[TRANSCRIPT] ✗ Directory does not exist")
+        if not RECORDINGS_DIR.exists():
+            logger.debug("[TRANSCRIPT] ✗ Directory does not exist")
             return {
                 "roomName": room_name,
                 "hasTranscript": False,
-                "message": f"Recordings directory not found: {recordings_dir}"
+                "message": f"Recordings directory not found: {RECORDINGS_DIR}"
             }
         
-        # List all files in this directory
-        all_files = list(recordings_dir.glob("*.json"))
-        print(f"[TRANSCRIPT] ✓ Found {len(all_files)} files")
-        
         # Find the most recent file for this room
-        matching_files = list(recordings_dir.glob(f"{room_name}_*.json"))
-        if not matching_files:
-            matching_files = [f for f in all_files if room_name in f.name]
+        latest = _latest_file(RECORDINGS_DIR, f"{room_name}_", ".json")
         
-        if not matching_files:
-            print(f"[TRANSCRIPT] ✗ No files found for room {room_name}\n")
+        if latest is None:
+            logger.debug("[TRANSCRIPT] ✗ No files found for room %s", room_name)
             return {
                 "roomName": room_name,
                 "hasTranscript": False,
                 "message": f"No transcript found for room {room_name}"
             }
         
-        # Get the most recent file
-        latest_file = max(matching_files, key=lambda p: p.stat().st_mtime)
-        print(f"[TRANSCRIPT] ✓ Using file: {latest_file.name}")
+        latest_file, mtime = latest
+        logger.debug("[TRANSCRIPT] ✓ Using file: %s", latest_file.name)
+        
+        cached = _transcript_cache.get(room_name)
+        if cached and cached[0] == mtime:
+            _transcript_cache.move_to_end(room_name)
+            return cached[1]
         
         # Read and return the transcript
-        with open(latest_file, 'r') as f:
-            transcript_data = json.load(f)
+        # Disk read + parse in the threadpool so the event loop keeps serving requests
+        transcript_data = await run_in_threadpool(lambda: _json_loads(latest_file.read_bytes()))
         
         messages = transcript_data.get("messages", [])
-        print(f"[TRANSCRIPT] ✓ Loaded {len(messages)} messages")
         
         # Convert messages to UI format
-        turns = []
-        for idx, msg in enumerate(messages):
-            # Determine speaker name
-            speaker = msg["speaker"]
-            if "dispatcher" in speaker.lower() or "tim" in speaker.lower():
-                display_speaker = "Dispatcher"
-            elif "driver" in speaker.lower() or "chris" in speaker.lower():
-                display_speaker = "Driver"
-            else:
-                display_speaker = speaker
-            
-            turns.append({
-                "speaker": display_speaker,
+        timestamp = transcript_data.get("timestamp", "")
+        turns = [
+            {
+                "speaker": _classify_speaker(msg["speaker"]),
                 "text": msg["message"],
-                "timestamp": transcript_data.get("timestamp", "")
-            })
-            print(f"[TRANSCRIPT]   {idx + 1}. {display_speaker}: {msg['message'][:50]}")
+                "timestamp": timestamp
+            }
+            for msg in messages
+        ]
         
-        print(f"[TRANSCRIPT] ✓ Returning {len(turns)} turns\n")
+        logger.debug("[TRANSCRIPT] ✓ Returning %d turns", len(turns))
         
-        return {
+        response = {
             "roomName": room_name,
             "hasTranscript": True,
             "timestamp": transcript_data.get("timestamp"),
             "messageCount": len(turns),
             "turns": turns
         }
+        _transcript_cache[room_name] = (mtime, response)
+        _transcript_cache.move_to_end(room_name)
+        if len(_transcript_cache) > _TRANSCRIPT_CACHE_SIZE:
+            _transcript_cache.popitem(last=False)
+        return response
     
     except Exception as e:
         import traceback
@@ -364,29 +416,13 @@ async def get_transcript(room_name: str):
 
 
 @router.get("/{room_name}/recording")
-async def get_recording(room_name: str):
+async def get_recording(room_name: str, lk_api: api.LiveKitAPI = Depends(get_lk_api)):
     """
     Get recording URL and transcript for a completed conversation.
     
     LiveKit automatically records rooms. This endpoint retrieves the recording information.
     """
     try:
-        livekit_url = os.getenv("LIVEKIT_URL")
-        api_key = os.getenv("LIVEKIT_API_KEY")
-        api_secret = os.getenv("LIVEKIT_API_SECRET")
-        
-        if not all([livekit_url, api_key, api_secret]):
-            raise HTTPException(
-                status_code=500,
-                detail="LiveKit credentials not configured"
-            )
-        
-        lk_api = api.LiveKitAPI(
-            url=livekit_url,
-            api_key=api_key,
-            api_secret=api_secret
-        )
-        
         # List recordings for this room
         # Note: This API may vary - check LiveKit documentation
         try:
@@ -394,7 +430,6 @@ async def get_recording(room_name: str):
             recordings = await lk_api.recording.list_recordings(
                 room=room_name
             )
-            await lk_api.aclose()
             
             return {
                 "roomName": room_name,
@@ -410,7 +445,6 @@ async def get_recording(room_name: str):
             }
         except AttributeError:
             # If recording API not available, return placeholder
-            await lk_api.aclose()
             return {
                 "roomName": room_name,
                 "recordingAvailable": False,
@@ -439,26 +473,18 @@ async def upload_audio(room_name: str, audio: UploadFile = File(...)):
     and saves it to the recordings/audio directory.
     """
     try:
-        # Create audio recordings directory if it doesn't exist
-        audio_dir = backend_dir / "recordings" / "audio"
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        
-        print(f"\n[AUDIO UPLOAD] Receiving audio for room: {room_name}")
-        print(f"[AUDIO UPLOAD] File: {audio.filename}, Type: {audio.content_type}")
+        logger.debug("[AUDIO UPLOAD] Receiving %s (%s) for room %s", audio.filename, audio.content_type, room_name)
         
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{room_name}_{timestamp}.mp3"
-        filepath = audio_dir / filename
+        filepath = AUDIO_DIR / filename
         
-        # Save the uploaded file
-        content = await audio.read()
-        file_size_mb = len(content) / (1024 * 1024)
+        # Copy the spooled upload to disk in one threadpool call, off the event loop
+        size = await run_in_threadpool(_save_upload, audio.file, filepath)
+        file_size_mb = size / (1024 * 1024)
         
-        with open(filepath, "wb") as f:
-            f.write(content)
-        
-        print(f"[AUDIO UPLOAD] ✓ Saved {file_size_mb:.2f}MB to {filepath}")
+        logger.debug("[AUDIO UPLOAD] ✓ Saved %.2fMB to %s", file_size_mb, filepath)
         
         return {
             "success": True,
@@ -486,36 +512,41 @@ async def get_audio(room_name: str):
     Returns the MP3 audio file that was uploaded after the conversation.
     """
     try:
-        audio_dir = backend_dir / "recordings" / "audio"
-        
-        print(f"\n[AUDIO FETCH] Searching for audio: {room_name}")
-        print(f"[AUDIO FETCH] Directory: {audio_dir}")
+        logger.debug("[AUDIO FETCH] Searching for audio for room %s in %s", room_name, AUDIO_DIR)
         
-        if not audio_dir.exists():
-            print(f"[AUDIO FETCH] ✗ Directory does not exist")
+        if not AUDIO_DIR.exists():
+            logger.debug("[AUDIO FETCH] ✗ Directory does not exist")
             raise HTTPException(
                 status_code=404,
                 detail="Audio recordings directory not found"
             )
         
         # Find the most recent audio file for this room
-        matching_files = list(audio_dir.glob(f"{room_name}_*.mp3"))
+        latest = _latest_file(AUDIO_DIR, f"{room_name}_", ".mp3")
         
-        if not matching_files:
-            print(f"[AUDIO FETCH] ✗ No audio file found for room {room_name}")
+        if latest is None:
+            logger.debug("[AUDIO FETCH] ✗ No audio file found for room %s", room_name)
             raise HTTPException(
                 status_code=404,
                 detail=f"No audio recording found for room {room_name}"
             )
         
-        # Get the most recent file
-        latest_file = max(matching_files, key=lambda p: p.stat().st_mtime)
-        file_size_mb = latest_file.stat().st_size / (1024 * 1024)
-        
-        print(f"[AUDIO FETCH] ✓ Found: {latest_file.name} ({file_size_mb:.2f}MB)")
+        latest_file, _ = latest
+        if logger.isEnabledFor(logging.DEBUG):
+            file_size_mb = latest_file.stat().st_size / (1024 * 1024)
+            logger.debug("[AUDIO FETCH] ✓ Found: %s (%.2fMB)", latest_file.name, file_size_mb)
         
         # Return the file
-        return FileResponse(
+        if USE_XACCEL_REDIRECT:
+            return Response(
+                media_type="audio/mpeg",
+                headers={
+                    "X-Accel-Redirect": f"{XACCEL_AUDIO_PREFIX}{latest_file.name}",
+                    "Content-Disposition": f'attachment; filename="{latest_file.name}"',
+                }
+            )
+        
+        return _AudioFileResponse(
             path=str(latest_file),
             media_type="audio/mpeg",
             filename=latest_file.name
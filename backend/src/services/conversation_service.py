@@ -1,47 +1,39 @@
 """Conversation Service for orchestrating agent conversations."""
-from typing import List, Dict
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Dict, Optional, Set, Tuple
 from datetime import datetime
-import os
-from langfuse import Langfuse
 from .llm_service import LLMService
 
 
-class ConversationTurn:
-    """Represents a single turn in a conversation."""
-    
-    def __init__(self, speaker: str, text: str):
-        """Initialize a conversation turn."""
-        self.speaker = speaker
-        self.text = text
-        self.timestamp = datetime.now()
+# Phrases that signal the conversation is wrapping up, matched anywhere in the text
+_END_PHRASES_RE = re.compile(
+    "|".join(
+        re.escape(phrase)
+        for phrase in (
+            "thanks",
+            "thank you",
+            "talk soon",
+            "have a good one",
+            "see you",
+            "bye",
+            "goodbye",
+            "sounds good",
+            "perfect",
+            "will do",
+        )
+    )
+)
 
 
-class ConversationService:
-    """Service for generating agent conversations."""
-    
-    def __init__(self, llm_service: LLMService):
-        """Initialize conversation service with LLM service."""
-        self.llm_service = llm_service
-        
-        # Initialize Langfuse for conversation-level tracing
-        langfuse_public_key = os.getenv("LANGFUSE_PUBLIC_KEY")
-        langfuse_secret_key = os.getenv("LANGFUSE_SECRET_KEY")
-        langfuse_host = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
-        
-        if langfuse_public_key and langfuse_secret_key:
-            self.langfuse = Langfuse(
-                public_key=langfuse_public_key,
-                secret_key=langfuse_secret_key,
-                host=langfuse_host
-            )
-            self.langfuse_enabled = True
-        else:
-            self.langfuse = None
-            self.langfuse_enabled = False
-    
-    def _format_scenario(self, scenario: Dict) -> str:
-        """Format scenario dictionary into readable text."""
-        return f"""
+@lru_cache(maxsize=256)
+def _format_scenario_items(items: Tuple) -> str:
+    """Format sorted scenario items into readable text, memoized per scenario."""
+    scenario = dict(items)
+    return f"""
 Load ID: {scenario['loadId']}
 Load Type: {scenario['loadType']}
 Weight: {scenario['weight']} lbs
@@ -53,24 +45,80 @@ Accessorials: {scenario['accessorials']}
 Securement: {scenario['securementRequirements']}
 TMS Update: {scenario['tmsUpdate']}
 """
+
+
+@lru_cache(maxsize=256)
+def _build_system_prompts(dispatcher_prompt: str, driver_prompt: str, scenario_text: str) -> Tuple[str, str]:
+    """Build the dispatcher and driver system prompts, memoized per prompt pair and scenario."""
+    dispatcher_system = f"""{dispatcher_prompt}
+
+You are having a phone conversation with a driver about a load assignment.
+Scenario: {scenario_text}
+
+Keep responses natural, brief, and conversational. Don't include stage directions.
+"""
     
-    def _conversation_to_messages(self, conversation: List[ConversationTurn], speaker: str) -> List[Dict]:
-        """
-        Convert conversation history to message format for LLM.
+    driver_system = f"""{driver_prompt}
+
+You are having a phone conversation with a dispatcher about a load assignment.
+Scenario: {scenario_text}
+
+Keep responses natural, brief, and conversational. Don't include stage directions.
+Respond appropriately to what the dispatcher says.
+"""
+    return dispatcher_system, driver_system
+
+
+def _report_update_failure(task: asyncio.Task) -> None:
+    """Print a warning if a background trace update failed."""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠ Langfuse trace update failed: {task.exception()}")
+
+
+@dataclass(slots=True, frozen=True)
+class ConversationTurn:
+    """Represents a single turn in a conversation."""
+    speaker: str
+    text: str
+    # Raw wall-clock nanoseconds; converted to a datetime only when read
+    timestamp_ns: int = field(default_factory=time.time_ns)
+    
+    @property
+    def timestamp(self) -> datetime:
+        """When the turn was created, as a local datetime."""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
+
+
+class ConversationService:
+    """Service for generating agent conversations."""
+    
+    def __init__(self, llm_service: LLMService):
+        """Initialize conversation service with LLM service."""
+        self.llm_service = llm_service
         
-        Args:
-            conversation: List of conversation turns
-            speaker: The speaker whose perspective to use ("Dispatcher" or "Driver")
+        # Conversation-level traces go through the LLM service's Langfuse client
+        self.langfuse = llm_service.langfuse
+        self.langfuse_enabled = llm_service.langfuse_enabled
         
-        Returns:
-            List of message dictionaries with role and content
-        """
-        messages = []
-        for turn in conversation:
-            # From the speaker's perspective: their messages are "assistant", others are "user"
-            role = "assistant" if turn.speaker == speaker else "user"
-            messages.append({"role": role, "content": turn.text})
-        return messages
+        # Strong references to in-flight telemetry tasks so they aren't GC'd mid-run
+        self._bg_tasks: Set[asyncio.Task] = set()
+    
+    def _run_in_background(self, fn: Callable, *args, **kwargs) -> asyncio.Task:
+        """Run a blocking telemetry call in a worker thread, off the turn loop's critical path."""
+        task = asyncio.create_task(asyncio.to_thread(fn, *args, **kwargs))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+        return task
+    
+    async def aclose(self):
+        """Let pending telemetry finish, then close the LLM service (which flushes Langfuse)."""
+        if self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+        await self.llm_service.aclose()
+    
+    def _format_scenario(self, scenario: Dict) -> str:
+        """Format scenario dictionary into readable text."""
+        return _format_scenario_items(tuple(sorted(scenario.items())))
     
     def _is_conversation_complete(self, text: str) -> bool:
         """
@@ -82,28 +130,10 @@ TMS Update: {scenario['tmsUpdate']}
         Returns:
             True if conversation should end, False otherwise
         """
-        text_lower = text.lower()
-        end_phrases = [
-            "thanks",
-            "thank you",
-            "talk soon",
-            "have a good one",
-            "see you",
-            "bye",
-            "goodbye",
-            "sounds good",
-            "perfect",
-            "will do"
-        ]
-        
-        # Check if message is short and contains ending phrase
-        words = text_lower.split()
-        if len(words) <= 15:  # Short message
-            for phrase in end_phrases:
-                if phrase in text_lower:
-                    return True
-        
-        return False
+        # Only short messages can end the conversation
+        if len(text.split()) > 15:
+            return False
+        return _END_PHRASES_RE.search(text.lower()) is not None
     
     async def generate_conversation(
         self,
@@ -115,6 +145,8 @@ TMS Update: {scenario['tmsUpdate']}
         """
         Generate a multi-turn conversation between dispatcher and driver.
         
+        Collects the turns from iter_conversation into a list.
+        
         Args:
             scenario: Load scenario dictionary
             dispatcher_prompt: System prompt for dispatcher agent
@@ -124,101 +156,128 @@ TMS Update: {scenario['tmsUpdate']}
         Returns:
             List of conversation turns
         """
-        # Create Langfuse trace for the entire conversation
-        trace = None
-        if self.langfuse_enabled:
-            try:
-                trace = self.langfuse.trace(
-                    name="conversation_generation",
-                    metadata={
-                        "scenario": scenario.get("loadId"),
-                        "max_turns": max_turns
-                    }
-                )
-            except Exception as e:
-                print(f"⚠ Langfuse trace creation failed: {e}")
-        
-        conversation = []
-        
-        # Format scenario for prompts
-        scenario_text = self._format_scenario(scenario)
-        
-        # Create system prompts
-        dispatcher_system = f"""{dispatcher_prompt}
-
-You are having a phone conversation with a driver about a load assignment.
-Scenario: {scenario_text}
-
-Keep responses natural, brief, and conversational. Don't include stage directions.
-"""
+        return [
+            turn
+            async for turn in self.iter_conversation(
+                scenario, dispatcher_prompt, driver_prompt, max_turns
+            )
+        ]
+    
+    async def iter_conversation(
+        self,
+        scenario: Dict,
+        dispatcher_prompt: str,
+        driver_prompt: str,
+        max_turns: int = 20
+    ) -> AsyncIterator[ConversationTurn]:
+        """
+        Generate a multi-turn conversation, yielding each turn as soon as it is produced.
         
-        driver_system = f"""{driver_prompt}
-
-You are having a phone conversation with a dispatcher about a load assignment.
-Scenario: {scenario_text}
-
-Keep responses natural, brief, and conversational. Don't include stage directions.
-Respond appropriately to what the dispatcher says.
-"""
+        Turns are generated strictly sequentially: every LLM call depends on the
+        previous reply, so they must not be run concurrently. Only the per-speaker
+        message histories are retained; callers can write turns out as they arrive.
         
-        # Generate dispatcher opening
-        dispatcher_message = await self.llm_service.generate_response(
-            [
-                {"role": "system", "content": dispatcher_system},
-                {"role": "user", "content": "Start the conversation with a friendly greeting."}
-            ],
-            trace_name="dispatcher_opening"
-        )
+        Args:
+            scenario: Load scenario dictionary
+            dispatcher_prompt: System prompt for dispatcher agent
+            driver_prompt: System prompt for driver agent
+            max_turns: Maximum number of conversation turns
         
-        conversation.append(ConversationTurn("Dispatcher", dispatcher_message))
+        Yields:
+            Conversation turns in order
+        """
+        # Create Langfuse trace for the entire conversation in the background
+        trace_task: Optional[asyncio.Task] = None
+        if self.langfuse_enabled:
+            trace_task = self._run_in_background(
+                self.langfuse.trace,
+                name="conversation_generation",
+                metadata={
+                    "scenario": scenario.get("loadId"),
+                    "max_turns": max_turns
+                }
+            )
         
-        # Initialize message history for dispatcher
-        dispatcher_messages = [
-            {"role": "system", "content": dispatcher_system},
-            {"role": "assistant", "content": dispatcher_message}
-        ]
+        turn_count = 0
+        completed = False
         
-        # Generate alternating turns
-        for turn_num in range(max_turns):
-            # Driver responds
-            driver_messages = [
-                {"role": "system", "content": driver_system}
-            ] + self._conversation_to_messages(conversation, "Driver")
+        try:
+            # Format scenario for prompts
+            scenario_text = self._format_scenario(scenario)
             
-            driver_response = await self.llm_service.generate_response(
-                driver_messages,
-                trace_name=f"driver_turn_{turn_num}"
+            # Create system prompts
+            dispatcher_system, driver_system = _build_system_prompts(
+                dispatcher_prompt, driver_prompt, scenario_text
             )
-            conversation.append(ConversationTurn("Driver", driver_response))
-            
-            # Check if conversation should end
-            if self._is_conversation_complete(driver_response):
-                break
             
-            # Dispatcher responds
-            dispatcher_messages.append({"role": "user", "content": driver_response})
-            dispatcher_response = await self.llm_service.generate_response(
-                dispatcher_messages,
-                trace_name=f"dispatcher_turn_{turn_num}"
+            # Generate dispatcher opening
+            dispatcher_message = await self.llm_service.generate_response(
+                [
+                    {"role": "system", "content": dispatcher_system},
+                    {"role": "user", "content": "Start the conversation with a friendly greeting."}
+                ],
+                trace_name="dispatcher_opening"
             )
-            conversation.append(ConversationTurn("Dispatcher", dispatcher_response))
-            dispatcher_messages.append({"role": "assistant", "content": dispatcher_response})
             
-            # Check if conversation should end
-            if self._is_conversation_complete(dispatcher_response):
-                break
-        
-        # Update trace with final metadata
-        if trace:
-            try:
-                trace.update(
-                    metadata={
-                        "total_turns": len(conversation),
-                        "completed": True
-                    }
+            turn_count += 1
+            yield ConversationTurn("Dispatcher", dispatcher_message)
+            
+            # Message histories from each speaker's perspective, extended in place:
+            # their own lines are "assistant", the other side's are "user"
+            dispatcher_messages = [
+                {"role": "system", "content": dispatcher_system},
+                {"role": "assistant", "content": dispatcher_message}
+            ]
+            driver_messages = [
+                {"role": "system", "content": driver_system},
+                {"role": "user", "content": dispatcher_message}
+            ]
+            
+            # Generate alternating turns
+            for turn_num in range(max_turns):
+                # Driver responds
+                driver_response = await self.llm_service.generate_response(
+                    driver_messages,
+                    trace_name=f"driver_turn_{turn_num}"
                 )
-            except Exception as e:
-                print(f"⚠ Langfuse trace update failed: {e}")
-        
-        return conversation
-
+                turn_count += 1
+                yield ConversationTurn("Driver", driver_response)
+                driver_messages.append({"role": "assistant", "content": driver_response})
+                
+                # Check if conversation should end
+                if self._is_conversation_complete(driver_response):
+                    break
+                
+                # Dispatcher responds
+                dispatcher_messages.append({"role": "user", "content": driver_response})
+                dispatcher_response = await self.llm_service.generate_response(
+                    dispatcher_messages,
+                    trace_name=f"dispatcher_turn_{turn_num}"
+                )
+                turn_count += 1
+                yield ConversationTurn("Dispatcher", dispatcher_response)
+                dispatcher_messages.append({"role": "assistant", "content": dispatcher_response})
+                driver_messages.append({"role": "user", "content": dispatcher_response})
+                
+                # Check if conversation should end
+                if self._is_conversation_complete(dispatcher_response):
+                    break
+            
+            completed = True
+        finally:
+            # Update trace with final metadata (fire-and-forget), even if the
+            # conversation failed or the consumer stopped iterating early
+            if trace_task:
+                try:
+                    trace = await trace_task
+                except Exception as e:
+                    print(f"⚠ Langfuse trace creation failed: {e}")
+                else:
+                    update_task = self._run_in_background(
+                        trace.update,
+                        metadata={
+                            "total_turns": turn_count,
+                            "completed": completed
+                        }
+                    )
+                    update_task.add_done_callback(_report_update_failure)
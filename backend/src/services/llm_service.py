@@ -1,15 +1,57 @@
 """LLM Service for OpenRouter API integration."""
+import asyncio
+import hashlib
 import httpx
+import json
+from collections import OrderedDict
+from importlib.util import find_spec
 from typing import List, Dict, Optional
 import os
+import random
 from langfuse import Langfuse
 
+try:
+    import orjson
+    
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+    
+    _json_loads = json.loads
+
+# Providers that only cache a prompt prefix when it carries an explicit cache_control
+# breakpoint; OpenAI models cache long prefixes automatically
+_EXPLICIT_CACHE_PROVIDERS = ("anthropic/", "google/")
+
+# HTTP/2 multiplexing needs the optional h2 package (httpx[http2])
+_HTTP2_AVAILABLE = find_spec("h2") is not None
+
+
+def _with_prompt_cache(messages: List[Dict], model: str) -> List[Dict]:
+    """Mark the system prompt as a cacheable prefix for providers that need it."""
+    if not model.startswith(_EXPLICIT_CACHE_PROVIDERS) or not messages:
+        return messages
+    first = messages[0]
+    if first.get("role") != "system" or not isinstance(first.get("content"), str):
+        return messages
+    cached_system = {
+        "role": "system",
+        "content": [
+            {"type": "text", "text": first["content"], "cache_control": {"type": "ephemeral"}}
+        ]
+    }
+    return [cached_system, *messages[1:]]
+
 
 class LLMService:
     """Service for interacting with LLMs via OpenRouter API."""
     
-    def __init__(self, api_key: str):
-        """Initialize LLM service with API key."""
+    RESPONSE_CACHE_SIZE = 1024
+    
+    def __init__(self, api_key: str, sample_rate: Optional[float] = None):
+        """Initialize LLM service with API key and trace sample rate (default: LANGFUSE_SAMPLE_RATE or 0.1)."""
         self.api_key = api_key
         self.base_url = "https://openrouter.ai/api/v1"
         self.headers = {
@@ -24,23 +66,101 @@ class LLMService:
         langfuse_host = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
         
         if langfuse_public_key and langfuse_secret_key:
+            # Events are queued and shipped by the SDK's background thread;
+            # batch up to 100 of them or every 5s so exports stay off the request path
             self.langfuse = Langfuse(
                 public_key=langfuse_public_key,
                 secret_key=langfuse_secret_key,
-                host=langfuse_host
+                host=langfuse_host,
+                flush_at=100,
+                flush_interval=5.0
             )
             self.langfuse_enabled = True
         else:
             self.langfuse = None
             self.langfuse_enabled = False
             print("⚠ Langfuse not configured - observability disabled")
+        
+        # Fraction of successful calls to trace; failed calls are always traced
+        if sample_rate is None:
+            sample_rate = float(os.getenv("LANGFUSE_SAMPLE_RATE", "0.1"))
+        self.sample_rate = sample_rate
+        
+        # Responses to deterministic (temperature 0) requests, keyed by request body digest
+        self._response_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        
+        # Created on first use and reused so connections (and TLS sessions) are pooled
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                http2=_HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=64,
+                    max_keepalive_connections=32,
+                    keepalive_expiry=300,
+                ),
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Flush buffered Langfuse events and close the pooled HTTP client."""
+        if self.langfuse is not None:
+            await asyncio.to_thread(self.langfuse.flush)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _start_generation(
+        self,
+        trace_name: str,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float
+    ):
+        """Create a Langfuse trace and generation for one LLM call, or None if that fails."""
+        try:
+            trace = self.langfuse.trace(name=trace_name)
+            # Only the newest message is sent; the history grows every turn and is
+            # attached in full only when the call fails (see _record_error)
+            return trace.generation(
+                name="openrouter_chat",
+                model=model,
+                input=messages[-1:],
+                metadata={"temperature": temperature, "message_count": len(messages)}
+            )
+        except Exception as e:
+            print(f"⚠ Langfuse trace creation failed: {e}")
+            return None
+    
+    def _record_error(self, generation, status_message: str, **trace_kwargs):
+        """End a call's generation as an error with its full input, tracing it even if it wasn't head-sampled."""
+        if generation is None and self.langfuse_enabled:
+            generation = self._start_generation(**trace_kwargs)
+        if generation:
+            try:
+                generation.end(
+                    input=trace_kwargs["messages"],
+                    output=None,
+                    level="ERROR",
+                    status_message=status_message
+                )
+            except Exception:
+                pass
     
     async def generate_response(
         self,
         messages: List[Dict[str, str]],
         model: str = "openai/gpt-4o-mini",
         temperature: float = 0.7,
-        trace_name: str = "llm_call"
+        trace_name: str = "llm_call",
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict] = None
     ) -> str:
         """
         Generate a response from the LLM.
@@ -50,80 +170,82 @@ class LLMService:
             model: Model to use for generation
             temperature: Temperature for generation (0.0 to 1.0)
             trace_name: Name for Langfuse trace
+            max_tokens: Cap on generated tokens (model default if None)
+            response_format: OpenAI-style response format, e.g. {"type": "json_object"}
         
         Returns:
             Generated text response
         """
-        # Create Langfuse trace if enabled
-        trace = None
-        generation = None
+        payload = {
+            "model": model,
+            "messages": _with_prompt_cache(messages, model),
+            "temperature": temperature
+        }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if response_format is not None:
+            payload["response_format"] = response_format
+        body = _json_dumps(payload)
         
-        if self.langfuse_enabled:
-            try:
-                trace = self.langfuse.trace(name=trace_name)
-                generation = trace.generation(
-                    name="openrouter_chat",
-                    model=model,
-                    input=messages,
-                    metadata={"temperature": temperature}
-                )
-            except Exception as e:
-                print(f"⚠ Langfuse trace creation failed: {e}")
+        # Temperature 0 is deterministic enough to answer repeats from memory
+        cache_key = None
+        if temperature == 0:
+            cache_key = hashlib.blake2b(body, digest_size=16).digest()
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                return cached
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "temperature": temperature
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                
-                # Log successful response to Langfuse
-                if generation:
-                    try:
-                        generation.end(
-                            output=content,
-                            metadata={
-                                "usage": data.get("usage", {}),
-                                "model": model
-                            }
-                        )
-                    except Exception as e:
-                        print(f"⚠ Langfuse logging failed: {e}")
-                
-                return content
-                
-            except httpx.HTTPStatusError as e:
-                # Log error to Langfuse
-                if generation:
-                    try:
-                        generation.end(
-                            output=None,
-                            level="ERROR",
-                            status_message=f"HTTP {e.response.status_code}"
-                        )
-                    except:
-                        pass
-                raise Exception(f"HTTP error {e.response.status_code}: {e.response.text}")
-            except httpx.TimeoutException:
-                if generation:
-                    try:
-                        generation.end(output=None, level="ERROR", status_message="Timeout")
-                    except:
-                        pass
-                raise Exception("Request timed out")
-            except Exception as e:
-                if generation:
-                    try:
-                        generation.end(output=None, level="ERROR", status_message=str(e))
-                    except:
-                        pass
-                raise Exception(f"LLM generation error: {str(e)}")
-
+        trace_kwargs = {
+            "trace_name": trace_name,
+            "messages": messages,
+            "model": model,
+            "temperature": temperature
+        }
+        
+        # Head-sample the Langfuse trace; errors are traced regardless (see _record_error)
+        generation = None
+        if self.langfuse_enabled and random.random() < self.sample_rate:
+            generation = self._start_generation(**trace_kwargs)
+        
+        client = self._get_client()
+        try:
+            response = await client.post(
+                "/chat/completions",
+                content=body,
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+            data = _json_loads(response.content)
+            content = data["choices"][0]["message"]["content"]
+            
+            # Log successful response to Langfuse
+            if generation:
+                try:
+                    generation.end(
+                        output=content,
+                        metadata={
+                            "usage": data.get("usage", {}),
+                            "model": model
+                        }
+                    )
+                except Exception as e:
+                    print(f"⚠ Langfuse logging failed: {e}")
+            
+            if cache_key is not None:
+                self._response_cache[cache_key] = content
+                if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
+            
+            return content
+            
+        except httpx.HTTPStatusError as e:
+            # Log error to Langfuse
+            self._record_error(generation, f"HTTP {e.response.status_code}", **trace_kwargs)
+            raise Exception(f"HTTP error {e.response.status_code}: {e.response.text}")
+        except httpx.TimeoutException:
+            self._record_error(generation, "Timeout", **trace_kwargs)
+            raise Exception("Request timed out")
+        except Exception as e:
+            self._record_error(generation, str(e), **trace_kwargs)
+            raise Exception(f"LLM generation error: {str(e)}")
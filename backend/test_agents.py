@@ -8,6 +8,7 @@ This script verifies that:
 3. Agent classes are properly structured
 4. Function tools are correctly defined
 """
+import importlib.util
 import sys
 from pathlib import Path
 
@@ -33,14 +34,21 @@ dependencies = {
     "dotenv": "python-dotenv",
 }
 
+def _is_installed(module):
+    """Check a module can be found without executing it (parent packages are still imported)."""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:  # a parent package is missing
+        return False
+
+
 failed_imports = []
 for module, name in dependencies.items():
-    try:
-        __import__(module)
+    if _is_installed(module):
         print(f"[OK] {name:30} ... OK")
-    except ImportError as e:
+    else:
         print(f"[FAIL] {name:30} ... FAILED")
-        failed_imports.append((name, str(e)))
+        failed_imports.append((name, f"No module named '{module}'"))
 
 # Check VAD class specifically
 try:
@@ -8,10 +8,16 @@ This script tests the complete audio recording flow:
 
 Run this script with:
     python test_audio_recording.py
+
+The 5MB upload test is slow and is skipped unless RUN_SLOW_TESTS=1 is set.
 """
 
 import asyncio
+import functools
+import os
 import sys
+import tempfile
+import unittest
 from pathlib import Path
 import io
 
@@ -23,12 +29,30 @@ from src.api.main import app
 
 client = TestClient(app)
 
+RUN_SLOW_TESTS = bool(os.getenv("RUN_SLOW_TESTS"))
+
+# Print full tracebacks for erroring tests only when asked (TEST_VERBOSE=1)
+VERBOSE = os.getenv("TEST_VERBOSE") == "1"
+
+_AUDIO_DIR = Path(__file__).parent / "recordings" / "audio"
+
+# Room and payload size from the upload test, so retrieval can reuse the stored file
+_uploaded = {}
+
+# Filenames returned by uploads made in this run, removed by cleanup_test_files()
+_CREATED_FILES = set()
+
+
+@functools.lru_cache(maxsize=8)
+def mock_audio_bytes(size_kb: int = 100) -> bytes:
+    """Build (once per size) the payload of a mock MP3-like file: an ID3 header padded with zeros."""
+    return b"ID3".ljust(size_kb * 1024, b"\x00")
+
 
 def create_mock_audio_file(size_kb: int = 100) -> io.BytesIO:
     """Create a mock audio file for testing."""
-    # Create a simple mock MP3-like file
-    mock_data = b"ID3" + b"\x00" * (size_kb * 1024 - 3)
-    return io.BytesIO(mock_data)
+    # BytesIO shares the cached bytes until written to, so this does not copy the payload
+    return io.BytesIO(mock_audio_bytes(size_kb))
 
 
 def test_audio_upload():
@@ -48,17 +72,19 @@ def test_audio_upload():
     )
     
     print(f"Status Code: {response.status_code}")
-    print(f"Response: {response.json()}")
     
     if response.status_code == 200:
         data = response.json()
+        _CREATED_FILES.add(data["filename"])
+        _uploaded["room_name"] = room_name
+        _uploaded["size"] = 100 * 1024
         print(f"✅ PASS: Audio uploaded successfully")
         print(f"   - Filename: {data.get('filename')}")
         print(f"   - File Size: {data.get('fileSize')}")
-        return True
     else:
         print(f"❌ FAIL: Upload failed")
-        return False
+        print(f"   Response: {response.text[:200]}")
+        raise AssertionError("Upload failed")
 
 
 def test_audio_retrieval():
@@ -66,34 +92,47 @@ def test_audio_retrieval():
     print("\n🧪 TEST 2: Audio Retrieval")
     print("-" * 50)
     
-    # First upload a file
-    room_name = "test_room_audio_002"
-    audio_file = create_mock_audio_file(50)
-    
-    upload_response = client.post(
-        f"/api/v1/rooms/{room_name}/upload-audio",
-        files={"audio": ("test_audio.mp3", audio_file, "audio/mpeg")}
-    )
-    
-    if upload_response.status_code != 200:
-        print("❌ FAIL: Could not upload test file")
-        return False
-    
-    print("✅ Test file uploaded")
+    if _uploaded:
+        # Reuse the file stored by the upload test
+        room_name = _uploaded["room_name"]
+        expected_size = _uploaded["size"]
+        print(f"✅ Reusing file uploaded for {room_name}")
+    else:
+        # Running standalone: upload a file first
+        room_name = "test_room_audio_002"
+        expected_size = 50 * 1024
+        audio_file = create_mock_audio_file(50)
+        
+        upload_response = client.post(
+            f"/api/v1/rooms/{room_name}/upload-audio",
+            files={"audio": ("test_audio.mp3", audio_file, "audio/mpeg")}
+        )
+        
+        if upload_response.status_code != 200:
+            print("❌ FAIL: Could not upload test file")
+            raise AssertionError("Could not upload test file")
+        _CREATED_FILES.add(upload_response.json()["filename"])
+        
+        print("✅ Test file uploaded")
     
-    # Try to retrieve the file
-    response = client.get(f"/api/v1/rooms/{room_name}/audio")
+    # Try to retrieve the file, counting bytes as they stream in rather than buffering the body
+    with client.stream("GET", f"/api/v1/rooms/{room_name}/audio") as response:
+        total = sum(len(chunk) for chunk in response.iter_bytes(chunk_size=65536))
+        content_type = response.headers.get('content-type')
     
     print(f"Status Code: {response.status_code}")
-    print(f"Content Type: {response.headers.get('content-type')}")
-    print(f"Content Length: {len(response.content)} bytes")
-    
-    if response.status_code == 200 and response.headers.get('content-type') == 'audio/mpeg':
+    print(f"Content Type: {content_type}")
+    print(f"Content Length: {total} bytes")
+    
+    if (
+        response.status_code == 200
+        and content_type == 'audio/mpeg'
+        and total == expected_size
+    ):
         print(f"✅ PASS: Audio retrieved successfully")
-        return True
     else:
         print(f"❌ FAIL: Retrieval failed")
-        return False
+        raise AssertionError("Retrieval failed")
 
 
 def test_audio_not_found():
@@ -109,10 +148,9 @@ def test_audio_not_found():
     
     if response.status_code == 404:
         print(f"✅ PASS: Correctly returns 404 for non-existent audio")
-        return True
     else:
         print(f"❌ FAIL: Should return 404")
-        return False
+        raise AssertionError("Should return 404")
 
 
 def test_directory_structure():
@@ -120,55 +158,58 @@ def test_directory_structure():
     print("\n🧪 TEST 4: Directory Structure")
     print("-" * 50)
     
-    backend_dir = Path(__file__).parent
-    audio_dir = backend_dir / "recordings" / "audio"
-    
-    print(f"Checking: {audio_dir}")
+    print(f"Checking: {_AUDIO_DIR}")
     
-    if audio_dir.exists() and audio_dir.is_dir():
+    if _AUDIO_DIR.is_dir():
         print(f"✅ PASS: Audio directory exists")
         
         # List files
-        files = list(audio_dir.glob("*.mp3"))
+        with os.scandir(_AUDIO_DIR) as entries:
+            files = [e for e in entries if e.name.endswith(".mp3")]
         print(f"   - Found {len(files)} MP3 files")
         
         if files:
             for f in files[:5]:  # Show first 5
                 size_mb = f.stat().st_size / (1024 * 1024)
                 print(f"   - {f.name} ({size_mb:.2f}MB)")
-        
-        return True
     else:
         print(f"❌ FAIL: Audio directory does not exist")
-        return False
+        raise AssertionError("Audio directory does not exist")
 
 
 def test_file_size_limits():
     """Test upload with large file."""
+    if not RUN_SLOW_TESTS:
+        raise unittest.SkipTest("slow; set RUN_SLOW_TESTS=1 to run")
+    
     print("\n🧪 TEST 5: Large File Upload")
     print("-" * 50)
     
     room_name = "test_room_large"
     
-    # Create a 5MB mock file
-    audio_file = create_mock_audio_file(5000)  # 5MB
-    
-    print("Uploading 5MB file...")
-    response = client.post(
-        f"/api/v1/rooms/{room_name}/upload-audio",
-        files={"audio": ("large_audio.mp3", audio_file, "audio/mpeg")}
-    )
+    # Create a 5MB mock file; past 256KB it spills to disk, and truncate()
+    # extends it with zeros, so the payload is never held in memory as a whole
+    with tempfile.SpooledTemporaryFile(max_size=256 * 1024) as audio_file:
+        audio_file.write(b"ID3")
+        audio_file.truncate(5000 * 1024)  # 5MB
+        audio_file.seek(0)
+        
+        print("Uploading 5MB file...")
+        response = client.post(
+            f"/api/v1/rooms/{room_name}/upload-audio",
+            files={"audio": ("large_audio.mp3", audio_file, "audio/mpeg")}
+        )
     
     print(f"Status Code: {response.status_code}")
     
     if response.status_code == 200:
         data = response.json()
+        _CREATED_FILES.add(data["filename"])
         print(f"✅ PASS: Large file uploaded successfully")
         print(f"   - File Size: {data.get('fileSize')}")
-        return True
     else:
         print(f"❌ FAIL: Large file upload failed")
-        return False
+        raise AssertionError("Large file upload failed")
 
 
 def cleanup_test_files():
@@ -176,19 +217,27 @@ def cleanup_test_files():
     print("\n🧹 Cleaning up test files...")
     print("-" * 50)
     
-    backend_dir = Path(__file__).parent
-    audio_dir = backend_dir / "recordings" / "audio"
-    
-    if audio_dir.exists():
-        test_files = list(audio_dir.glob("test_room_*.mp3"))
-        
-        for f in test_files:
-            f.unlink()
-            print(f"   Deleted: {f.name}")
-        
-        print(f"✅ Cleaned up {len(test_files)} test files")
-    else:
+    if not _CREATED_FILES:
         print("   No cleanup needed")
+        return
+    
+    # Only the files this run uploaded; no need to enumerate the directory
+    deleted = 0
+    for filename in sorted(_CREATED_FILES):
+        try:
+            os.unlink(_AUDIO_DIR / filename)
+        except FileNotFoundError:
+            continue
+        deleted += 1
+        print(f"   Deleted: {filename}")
+    _CREATED_FILES.clear()
+    
+    print(f"✅ Cleaned up {deleted} test files")
+
+
+def teardown_module(module):
+    """Remove uploaded test files after a pytest run (run_all_tests cleans up itself)."""
+    cleanup_test_files()
 
 
 def run_all_tests():
@@ -197,24 +246,32 @@ def run_all_tests():
     print("🚀 AUDIO RECORDING TEST SUITE")
     print("=" * 50)
     
+    # Retrieval reuses the upload test's file, so it must run after it
     tests = [
         ("Audio Upload", test_audio_upload),
         ("Audio Retrieval", test_audio_retrieval),
         ("Audio Not Found", test_audio_not_found),
         ("Directory Structure", test_directory_structure),
-        ("Large File Upload", test_file_size_limits),
     ]
+    if RUN_SLOW_TESTS:
+        tests.append(("Large File Upload", test_file_size_limits))
+    else:
+        print("\n⏭️  Skipping Large File Upload (set RUN_SLOW_TESTS=1 to run)")
     
     results = []
     
     for name, test_func in tests:
         try:
-            result = test_func()
-            results.append((name, result))
+            test_func()
+            results.append((name, True))
+        except AssertionError:
+            # The test already printed why it failed
+            results.append((name, False))
         except Exception as e:
             print(f"\n❌ ERROR in {name}: {e}")
-            import traceback
-            traceback.print_exc()
+            if VERBOSE:
+                import traceback
+                traceback.print_exc()
             results.append((name, False))
     
     # Cleanup
@@ -8,23 +8,32 @@ This test verifies:
 4. Recording endpoint returns data
 """
 
-import asyncio
-import json
 import sys
 from pathlib import Path
 from datetime import datetime
 
-# Add backend to path
+# Add backend (for src.*) and backend/agents (the agents import their siblings
+# as top-level modules) to the path once, up front
 backend_dir = Path(__file__).parent
-sys.path.insert(0, str(backend_dir))
+sys.path[:0] = [str(backend_dir), str(backend_dir / "agents")]
 
-from src.api.routes.rooms import CreateRoomRequest, Scenario, AgentConfig
-from dotenv import load_dotenv
+from pydantic import ValidationError
+from src.api.routes.rooms import CreateRoomRequest, Scenario, AgentConfig, _json_dumps, _json_loads
 import os
 
-# Load environment variables
+# Load environment variables from .env only when they aren't already set (e.g. in CI),
+# filling in missing keys without overriding existing ones
 env_file = backend_dir / ".env"
-load_dotenv(dotenv_path=env_file)
+if not os.getenv("LIVEKIT_URL"):
+    from dotenv import dotenv_values
+    os.environ.update({
+        key: value
+        for key, value in dotenv_values(env_file).items()
+        if value is not None and key not in os.environ
+    })
+
+# Print full tracebacks for failing tests only when asked (TEST_VERBOSE=1)
+VERBOSE = os.getenv("TEST_VERBOSE") == "1"
 
 
 class Colors:
@@ -37,30 +46,36 @@ class Colors:
     BOLD = '\033[1m'
 
 
+# Result line templates, built once; any other status renders as a yellow [TEST] line
+_STATUS_FMT = {
+    "PASS": f"{Colors.GREEN}[PASS] {{name}}: PASS{Colors.RESET}",
+    "FAIL": f"{Colors.RED}[FAIL] {{name}}: FAIL{Colors.RESET}",
+}
+_OTHER_FMT = f"{Colors.YELLOW}[TEST] {{name}}: {{status}}{Colors.RESET}"
+_SECTION_RULE = f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}"
+_SECTION_FMT = f"\n{_SECTION_RULE}\n{Colors.BOLD}{Colors.BLUE}{{title}}{Colors.RESET}\n{_SECTION_RULE}\n"
+
+
 def print_test(name: str, status: str, message: str = ""):
     """Print formatted test result."""
-    icon = "[PASS]" if status == "PASS" else "[FAIL]" if status == "FAIL" else "[TEST]"
-    color = Colors.GREEN if status == "PASS" else Colors.RED if status == "FAIL" else Colors.YELLOW
-    
-    print(f"{color}{icon} {name}: {status}{Colors.RESET}")
+    print(_STATUS_FMT.get(status, _OTHER_FMT).format(name=name, status=status))
     if message:
         print(f"   {message}")
 
 
 def print_section(title: str):
     """Print a formatted section header."""
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{title}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}\n")
+    print(_SECTION_FMT.format(title=title))
 
 
-async def test_custom_prompts():
+def test_custom_prompts():
     """Test that custom prompts are properly loaded from metadata."""
     print_section("Test 1: Custom Agent Prompts")
     
     try:
-        # Create test scenario
-        scenario = Scenario(
+        # Known-good payloads, so build them without running validation;
+        # validation itself is covered by the rejection check below
+        scenario = Scenario.model_construct(
             loadId="TEST-001",
             loadType="Test Load",
             weight=1000,
@@ -81,20 +96,20 @@ async def test_custom_prompts():
         custom_dispatcher_prompt = "You are a test dispatcher. Be brief and professional."
         custom_driver_prompt = "You are a test driver. Respond quickly."
         
-        dispatcher_agent = AgentConfig(
+        dispatcher_agent = AgentConfig.model_construct(
             role="dispatcher",
             prompt=custom_dispatcher_prompt,
             actingNotes="Test mode - keep responses short"
         )
         
-        driver_agent = AgentConfig(
+        driver_agent = AgentConfig.model_construct(
             role="driver",
             prompt=custom_driver_prompt,
             actingNotes="Test mode - accept quickly"
         )
         
         # Build request
-        request = CreateRoomRequest(
+        request = CreateRoomRequest.model_construct(
             scenario=scenario,
             dispatcherAgent=dispatcher_agent,
             driverAgent=driver_agent
@@ -113,36 +128,41 @@ async def test_custom_prompts():
         print_test("Acting Notes Storage", "PASS",
                   "Both agents have acting notes configured")
         
+        # Full validation path: a malformed scenario must be rejected
+        try:
+            Scenario(**{**scenario.model_dump(), "weight": "heavy"})
+        except ValidationError:
+            print_test("Scenario Validation", "PASS", "Invalid weight rejected")
+        else:
+            raise AssertionError("Scenario accepted a non-numeric weight")
+        
         # Simulate room metadata creation (as done in rooms.py)
         metadata_dict = {
             "scenario": scenario.model_dump(),
             "dispatcherAgent": dispatcher_agent.model_dump(),
             "driverAgent": driver_agent.model_dump()
         }
-        metadata_json = json.dumps(metadata_dict)
+        metadata_json = _json_dumps(metadata_dict)
         
-        # Verify metadata can be parsed back
-        parsed_metadata = json.loads(metadata_json)
+        # Verify metadata can be parsed back (with the same orjson-or-stdlib codec rooms.py uses)
+        parsed_metadata = _json_loads(metadata_json)
         assert parsed_metadata["dispatcherAgent"]["prompt"] == custom_dispatcher_prompt
         assert parsed_metadata["driverAgent"]["prompt"] == custom_driver_prompt
         
         print_test("Metadata Serialization", "PASS",
                   "Metadata round-trip successful")
         
-        return True
-        
     except Exception as e:
         print_test("Custom Prompts Test", "FAIL", str(e))
-        return False
+        raise
 
 
-async def test_end_conversation_tool():
+def test_end_conversation_tool():
     """Test that end_conversation tool is properly defined."""
     print_section("Test 2: End Conversation Tool")
     
     try:
         # Import agent classes
-        sys.path.insert(0, str(backend_dir / "agents"))
         from dispatcher_agent import DispatcherAgent
         from driver_agent import DriverAgent
         
@@ -173,13 +193,12 @@ async def test_end_conversation_tool():
         print_test("Agent Instructions", "PASS",
                   "Both agents instructed to call end_conversation when complete")
         
-        return True
-        
     except Exception as e:
         print_test("End Conversation Tool Test", "FAIL", str(e))
-        import traceback
-        traceback.print_exc()
-        return False
+        if VERBOSE:
+            import traceback
+            traceback.print_exc()
+        raise
 
 
 def test_api_endpoints():
@@ -187,8 +206,7 @@ def test_api_endpoints():
     print_section("Test 3: API Endpoints")
     
     try:
-        sys.path.insert(0, str(backend_dir / "src"))
-        from api.routes import rooms
+        from src.api.routes import rooms
         
         # Check that recording endpoint exists
         assert hasattr(rooms, 'get_recording'), "Recording endpoint not found"
@@ -204,13 +222,17 @@ def test_api_endpoints():
         print_test("Router Configuration", "PASS",
                   f"Router has {len(rooms.router.routes)} routes configured")
         
-        return True
-        
     except Exception as e:
         print_test("API Endpoints Test", "FAIL", str(e))
-        import traceback
-        traceback.print_exc()
-        return False
+        if VERBOSE:
+            import traceback
+            traceback.print_exc()
+        raise
+
+
+def _read_source(path: Path) -> str:
+    """Read a source file in one pass, replacing any bytes that aren't valid UTF-8."""
+    return path.read_bytes().decode("utf-8", errors="replace")
 
 
 def test_frontend_components():
@@ -220,14 +242,16 @@ def test_frontend_components():
     try:
         frontend_dir = backend_dir.parent / "frontend" / "src"
         
-        # Check ConversationPlayer component exists
-        player_component = frontend_dir / "components" / "ConversationPlayer.tsx"
-        assert player_component.exists(), "ConversationPlayer component not found"
-        
+        # One directory listing instead of a stat per component file
         try:
-            player_content = player_component.read_text(encoding='utf-8')
-        except:
-            player_content = player_component.read_text(encoding='latin-1')
+            with os.scandir(frontend_dir / "components") as entries:
+                components = {entry.name for entry in entries}
+        except FileNotFoundError:
+            components = set()
+        
+        # Check ConversationPlayer component exists
+        assert "ConversationPlayer.tsx" in components, "ConversationPlayer component not found"
+        player_content = _read_source(frontend_dir / "components" / "ConversationPlayer.tsx")
         
         assert "ConversationPlayer" in player_content, "ConversationPlayer export not found"
         assert "playback" in player_content.lower(), "Playback functionality not implemented"
@@ -236,18 +260,13 @@ def test_frontend_components():
                   "Component created with playback controls")
         
         # Check CSS for player
-        player_css = frontend_dir / "components" / "ConversationPlayer.css"
-        assert player_css.exists(), "ConversationPlayer CSS not found"
+        assert "ConversationPlayer.css" in components, "ConversationPlayer CSS not found"
         
         print_test("ConversationPlayer Styles", "PASS",
                   "CSS stylesheet created")
         
         # Check ConversationRoom updates
-        room_component = frontend_dir / "components" / "ConversationRoom.tsx"
-        try:
-            room_content = room_component.read_text(encoding='utf-8')
-        except:
-            room_content = room_component.read_text(encoding='latin-1')
+        room_content = _read_source(frontend_dir / "components" / "ConversationRoom.tsx")
         
         assert "ConversationPlayer" in room_content, "ConversationPlayer not imported"
         assert "showPlayer" in room_content, "Player state not managed"
@@ -257,11 +276,7 @@ def test_frontend_components():
                   "Player integration and state management added")
         
         # Check API service updates
-        api_service = frontend_dir / "services" / "api.ts"
-        try:
-            api_content = api_service.read_text(encoding='utf-8')
-        except:
-            api_content = api_service.read_text(encoding='latin-1')
+        api_content = _read_source(frontend_dir / "services" / "api.ts")
         
         assert "getRecording" in api_content, "getRecording function not found"
         assert "checkConversationStatus" in api_content, "Status check function not found"
@@ -269,37 +284,36 @@ def test_frontend_components():
         print_test("API Service Updates", "PASS",
                   "Recording and status check functions added")
         
-        return True
-        
     except Exception as e:
         print_test("Frontend Components Test", "FAIL", str(e))
-        import traceback
-        traceback.print_exc()
-        return False
+        if VERBOSE:
+            import traceback
+            traceback.print_exc()
+        raise
 
 
 def test_configuration_files():
     """Test that all configuration is properly set up."""
     print_section("Test 5: Configuration Files")
     
+    # Check environment variables
+    required_env = [
+        "LIVEKIT_URL",
+        "LIVEKIT_API_KEY",
+        "LIVEKIT_API_SECRET"
+    ]
+    
+    missing_env = [var for var in required_env if not os.getenv(var)]
+    
+    if missing_env:
+        print_test("Environment Variables", "FAIL",
+                  f"Missing: {', '.join(missing_env)}")
+        raise AssertionError(f"Missing: {', '.join(missing_env)}")
+    
+    print_test("Environment Variables", "PASS",
+              "All required LiveKit credentials configured")
+    
     try:
-        # Check environment variables
-        required_env = [
-            "LIVEKIT_URL",
-            "LIVEKIT_API_KEY",
-            "LIVEKIT_API_SECRET"
-        ]
-        
-        missing_env = [var for var in required_env if not os.getenv(var)]
-        
-        if missing_env:
-            print_test("Environment Variables", "FAIL",
-                      f"Missing: {', '.join(missing_env)}")
-            return False
-        else:
-            print_test("Environment Variables", "PASS",
-                      "All required LiveKit credentials configured")
-        
         # Check backend structure
         agents_dir = backend_dir / "agents"
         assert (agents_dir / "dispatcher_agent.py").exists(), "Dispatcher agent not found"
@@ -309,11 +323,18 @@ def test_configuration_files():
         print_test("Backend Agent Files", "PASS",
                   "All agent files present and properly configured")
         
-        return True
-        
     except Exception as e:
         print_test("Configuration Test", "FAIL", str(e))
+        raise
+
+
+def _passes(test_func) -> bool:
+    """Run one test, reporting whether it completed without raising."""
+    try:
+        test_func()
+    except Exception:
         return False
+    return True
 
 
 def main():
@@ -325,14 +346,15 @@ def main():
     print("=" * 60)
     print(Colors.RESET)
     
-    results = []
-    
-    # Run all tests
-    results.append(("Custom Prompts", asyncio.run(test_custom_prompts())))
-    results.append(("End Conversation Tool", asyncio.run(test_end_conversation_tool())))
-    results.append(("API Endpoints", test_api_endpoints()))
-    results.append(("Frontend Components", test_frontend_components()))
-    results.append(("Configuration", test_configuration_files()))
+    # Run all tests; each raises on failure (so pytest can collect them too)
+    tests = [
+        ("Custom Prompts", test_custom_prompts),
+        ("End Conversation Tool", test_end_conversation_tool),
+        ("API Endpoints", test_api_endpoints),
+        ("Frontend Components", test_frontend_components),
+        ("Configuration", test_configuration_files),
+    ]
+    results = [(name, _passes(test_func)) for name, test_func in tests]
     
     # Print summary
     print_section("Test Summary")
@@ -0,0 +1,60 @@
+"""Runner helpers shared by the async milestone test scripts (3-6)."""
+import asyncio
+import contextvars
+import io
+import sys
+
+# Buffer of the test running in the current task; tests run concurrently,
+# so each one's prints are collected separately and shown in order afterwards
+_test_output = contextvars.ContextVar("test_output", default=None)
+
+
+class _TaskOutput:
+    """stdout proxy writing to the current task's test buffer, if any."""
+    
+    def __init__(self, fallback):
+        self._fallback = fallback
+    
+    def write(self, text):
+        return (_test_output.get() or self._fallback).write(text)
+    
+    def flush(self):
+        (_test_output.get() or self._fallback).flush()
+
+
+async def _run_captured(test):
+    """Await one test coroutine with its output buffered; returns (passed, output)."""
+    buffer = io.StringIO()
+    _test_output.set(buffer)
+    try:
+        passed = await test
+    except Exception as e:
+        print(f"✗ Unexpected error: {e}")
+        passed = False
+    return passed is True, buffer.getvalue()
+
+
+async def run_concurrently(*tests):
+    """Run independent test coroutines concurrently and print their output in order."""
+    stdout = sys.stdout
+    sys.stdout = _TaskOutput(stdout)
+    try:
+        results = await asyncio.gather(*(_run_captured(test) for test in tests))
+    finally:
+        sys.stdout = stdout
+    
+    tests_passed = 0
+    for passed, output in results:
+        print(output)
+        tests_passed += passed
+    return tests_passed
+
+
+def run_main(main):
+    """Run a script's async main(), on uvloop when it's installed (it comes with uvicorn[standard], except on Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
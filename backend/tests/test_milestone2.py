@@ -1,24 +1,28 @@
 """Test script for Milestone 2: Pydantic Models & API Structure."""
-import requests
 import json
+import os
 import sys
 
+# Add backend to path so the app can be served in-process
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+from src.api.main import app
+
+client = TestClient(app)
+
+# Sample request payload, loaded once for all tests
+with open(os.path.join(os.path.dirname(__file__), "test_payload.json"), "r") as f:
+    TEST_PAYLOAD = json.load(f)
+
 def test_conversation_endpoint():
     """Test the conversation generation endpoint."""
     print("Testing conversation endpoint...")
     
-    # Load test payload
-    import os
-    test_dir = os.path.dirname(__file__)
-    with open(os.path.join(test_dir, "test_payload.json"), "r") as f:
-        payload = json.load(f)
-    
     try:
-        response = requests.post(
-            "http://localhost:8000/api/v1/conversations/generate",
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=10
+        response = client.post(
+            "/api/v1/conversations/generate",
+            json=TEST_PAYLOAD
         )
         
         if response.status_code == 200:
@@ -58,10 +62,6 @@ def test_conversation_endpoint():
             print(f"  Response: {response.text}")
             return False
     
-    except requests.exceptions.ConnectionError:
-        print("✗ Could not connect to server. Make sure it's running.")
-        print("  Run: uvicorn src.api.main:app --reload")
-        return False
     except Exception as e:
         print(f"✗ Error testing conversation endpoint: {e}")
         return False
@@ -70,7 +70,7 @@ def test_api_docs():
     """Test that API documentation is available."""
     print("Testing API documentation...")
     try:
-        response = requests.get("http://localhost:8000/docs", timeout=5)
+        response = client.get("/docs")
         if response.status_code == 200:
             print("✓ API documentation available at /docs")
             return True
@@ -86,13 +86,6 @@ if __name__ == "__main__":
     print("Milestone 2: Pydantic Models & API Structure - Tests")
     print("=" * 60)
     print()
-    print("Make sure the server is running:")
-    print("  cd backend")
-    print("  uvicorn src.api.main:app --reload")
-    print()
-    
-    input("Press Enter when server is ready...")
-    print()
     
     tests_passed = 0
     tests_total = 2
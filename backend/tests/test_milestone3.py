@@ -1,29 +1,28 @@
 """Test script for Milestone 3: LLM Service Integration."""
-import asyncio
+import json
 import os
 import sys
 
-# Add backend/src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# Add backend/src, and this directory for the shared runner helpers, to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
 
+from _async_runner import run_concurrently, run_main
 from services.llm_service import LLMService
 
+# Also run the separate single-answer tests, not just the batched plumbing check
+FULL_RUN = "--full" in sys.argv
 
-async def test_llm_basic():
+
+async def test_llm_basic(service: LLMService):
     """Test basic LLM functionality."""
     print("Testing basic LLM call...")
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("✗ OPENROUTER_API_KEY not set in environment")
-        print("  Please set it in your .env file or export it")
-        return False
-    
     try:
-        service = LLMService(api_key=api_key)
-        response = await service.generate_response([
-            {"role": "user", "content": "Say 'Hello! This is a test.' and nothing else."}
-        ])
+        response = await service.generate_response(
+            [{"role": "user", "content": "Say 'Hello! This is a test.' and nothing else."}],
+            max_tokens=16
+        )
         
         if response and len(response) > 0:
             print(f"✓ LLM responded successfully")
@@ -38,18 +37,44 @@ async def test_llm_basic():
         return False
 
 
-async def test_llm_conversation():
-    """Test LLM with conversation context."""
-    print("Testing LLM with conversation context...")
+async def test_llm_plumbing_batched(service: LLMService):
+    """Test a basic call and explicit model selection with one JSON-mode request."""
+    print("Testing basic LLM call with gpt-4o-mini (batched JSON check)...")
+    
+    try:
+        response = await service.generate_response(
+            messages=[{
+                "role": "user",
+                "content": 'Respond with exactly this JSON object: {"a": "Hello! This is a test.", "b": "42"}'
+            }],
+            model="openai/gpt-4o-mini",
+            temperature=0.0,
+            max_tokens=32,
+            response_format={"type": "json_object"}
+        )
+        
+        answers = json.loads(response)
+        if answers.get("a") and "42" in str(answers.get("b")):
+            print("✓ LLM responded successfully with gpt-4o-mini")
+            print(f"  Response: {response}")
+            return True
+        else:
+            print(f"✗ Unexpected JSON from LLM: {response}")
+            return False
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("✗ OPENROUTER_API_KEY not set")
+    except json.JSONDecodeError:
+        print(f"✗ LLM did not return JSON: {response}")
         return False
+    except Exception as e:
+        print(f"✗ Error calling LLM: {e}")
+        return False
+
+
+async def test_llm_conversation(service: LLMService):
+    """Test LLM with conversation context."""
+    print("Testing LLM with conversation context...")
     
     try:
-        service = LLMService(api_key=api_key)
-        
         # Simulate a dispatcher greeting
         response = await service.generate_response([
             {
@@ -82,21 +107,16 @@ async def test_llm_conversation():
         return False
 
 
-async def test_llm_different_model():
+async def test_llm_different_model(service: LLMService):
     """Test LLM with different model."""
     print("Testing LLM with gpt-4o-mini model...")
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("✗ OPENROUTER_API_KEY not set")
-        return False
-    
     try:
-        service = LLMService(api_key=api_key)
         response = await service.generate_response(
             messages=[{"role": "user", "content": "Respond with just the number 42."}],
             model="openai/gpt-4o-mini",
-            temperature=0.0
+            temperature=0.0,
+            max_tokens=16
         )
         
         if response:
@@ -112,6 +132,7 @@ async def test_llm_different_model():
         return False
 
 
+
 async def main():
     """Run all tests."""
     print("=" * 60)
@@ -136,20 +157,22 @@ async def main():
         print()
         return
     
-    tests_passed = 0
-    tests_total = 3
-    
-    if await test_llm_basic():
-        tests_passed += 1
-    print()
-    
-    if await test_llm_conversation():
-        tests_passed += 1
-    print()
-    
-    if await test_llm_different_model():
-        tests_passed += 1
-    print()
+    # One service for all tests, so they share its pooled connections;
+    # the tests are independent, so their LLM round-trips overlap.
+    # The batched check covers the basic and model-selection tests in one call;
+    # pass --full to run those separately as well
+    service = LLMService(api_key=os.getenv("OPENROUTER_API_KEY"))
+    tests = [
+        test_llm_plumbing_batched(service),
+        test_llm_conversation(service),
+    ]
+    if FULL_RUN:
+        tests += [test_llm_basic(service), test_llm_different_model(service)]
+    tests_total = len(tests)
+    try:
+        tests_passed = await run_concurrently(*tests)
+    finally:
+        await service.aclose()
     
     print("=" * 60)
     print(f"Tests: {tests_passed}/{tests_total} passed")
@@ -164,5 +187,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
+    run_main(main)
@@ -3,11 +3,27 @@ import asyncio
 import os
 import sys
 
-# Add backend/src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# Add backend/src, and this directory for the shared runner helpers, to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
 
+from _async_runner import run_concurrently, run_main
 from services.llm_service import LLMService
 
+# Opt-in stress run of many concurrent calls with sampled tracing (RUN_SLOW_TESTS=1)
+RUN_SLOW_TESTS = bool(os.getenv("RUN_SLOW_TESTS"))
+SAMPLED_TRACE_CALLS = 50
+SAMPLED_TRACE_RATE = 0.1
+
+# Caps LLM calls in flight across all tests, so fan-out stays under OpenRouter's rate limit
+_LLM_SEM = asyncio.Semaphore(int(os.getenv("LLM_TEST_CONCURRENCY", "8")))
+
+
+async def _generate(service: LLMService, **kwargs) -> str:
+    """Call service.generate_response once a concurrency slot is free."""
+    async with _LLM_SEM:
+        return await service.generate_response(**kwargs)
+
 
 async def test_langfuse_configured():
     """Test that Langfuse is configured."""
@@ -28,27 +44,22 @@ async def test_langfuse_configured():
     return True
 
 
-async def test_llm_with_tracing():
+async def test_llm_with_tracing(service: LLMService):
     """Test LLM call with Langfuse tracing."""
     print("Testing LLM with Langfuse tracing...")
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("✗ OPENROUTER_API_KEY not set")
-        return False
-    
     try:
-        service = LLMService(api_key=api_key)
-        
         if not service.langfuse_enabled:
             print("⚠ Langfuse not enabled - check configuration")
             return False
         
-        response = await service.generate_response(
+        response = await _generate(
+            service,
             messages=[
                 {"role": "user", "content": "Say 'Langfuse test successful' and nothing else."}
             ],
-            trace_name="test_langfuse_tracing"
+            trace_name="test_langfuse_tracing",
+            max_tokens=24
         )
         
         if response and len(response) > 0:
@@ -66,28 +77,25 @@ async def test_llm_with_tracing():
         return False
 
 
-async def test_multiple_traces():
+async def test_multiple_traces(service: LLMService):
     """Test multiple LLM calls with different trace names."""
     print("Testing multiple traces...")
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("✗ OPENROUTER_API_KEY not set")
-        return False
-    
     try:
-        service = LLMService(api_key=api_key)
-        
-        # First call
-        await service.generate_response(
-            messages=[{"role": "user", "content": "Count to 3"}],
-            trace_name="test_trace_1"
-        )
-        
-        # Second call
-        await service.generate_response(
-            messages=[{"role": "user", "content": "Say hello"}],
-            trace_name="test_trace_2"
+        # Both calls in flight at once over the shared client
+        await asyncio.gather(
+            _generate(
+                service,
+                messages=[{"role": "user", "content": "Count to 3"}],
+                trace_name="test_trace_1",
+                max_tokens=24
+            ),
+            _generate(
+                service,
+                messages=[{"role": "user", "content": "Say hello"}],
+                trace_name="test_trace_2",
+                max_tokens=24
+            ),
         )
         
         print("✓ Multiple traces created successfully")
@@ -101,6 +109,39 @@ async def test_multiple_traces():
         return False
 
 
+async def test_sampled_traces():
+    """Test many concurrent LLM calls with only a sample of them traced."""
+    print(f"Testing {SAMPLED_TRACE_CALLS} calls with {SAMPLED_TRACE_RATE:.0%} trace sampling...")
+    
+    service = LLMService(api_key=os.getenv("OPENROUTER_API_KEY"), sample_rate=SAMPLED_TRACE_RATE)
+    try:
+        responses = await asyncio.gather(
+            *(
+                _generate(
+                    service,
+                    messages=[{"role": "user", "content": "Say ok"}],
+                    trace_name="test_sampled_trace",
+                    max_tokens=24
+                )
+                for _ in range(SAMPLED_TRACE_CALLS)
+            ),
+            return_exceptions=True
+        )
+    finally:
+        await service.aclose()
+    
+    errors = [r for r in responses if isinstance(r, Exception)]
+    if errors:
+        print(f"✗ {len(errors)}/{SAMPLED_TRACE_CALLS} calls failed: {errors[0]}")
+        return False
+    
+    print(f"✓ All {SAMPLED_TRACE_CALLS} calls succeeded")
+    print(f"  → Expect about {SAMPLED_TRACE_CALLS * SAMPLED_TRACE_RATE:.0f} "
+          "test_sampled_trace traces in the Langfuse dashboard")
+    return True
+
+
+
 async def main():
     """Run all tests."""
     print("=" * 60)
@@ -133,20 +174,22 @@ async def main():
         print()
         return
     
-    tests_passed = 0
-    tests_total = 3
-    
-    if await test_langfuse_configured():
-        tests_passed += 1
-    print()
-    
-    if await test_llm_with_tracing():
-        tests_passed += 1
-    print()
-    
-    if await test_multiple_traces():
-        tests_passed += 1
-    print()
+    # One service for all tests, so they share its pooled connections; it traces
+    # every call (no sampling) so each trace the tests name shows up.
+    # The tests are independent, so their LLM round-trips overlap
+    service = LLMService(api_key=os.getenv("OPENROUTER_API_KEY"), sample_rate=1.0)
+    tests = [
+        test_langfuse_configured(),
+        test_llm_with_tracing(service),
+        test_multiple_traces(service),
+    ]
+    if RUN_SLOW_TESTS:
+        tests.append(test_sampled_traces())
+    tests_total = len(tests)
+    try:
+        tests_passed = await run_concurrently(*tests)
+    finally:
+        await service.aclose()
     
     print("=" * 60)
     print(f"Tests: {tests_passed}/{tests_total} passed")
@@ -164,5 +207,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
+    run_main(main)
@@ -1,41 +1,32 @@
 """Test script for Milestone 5: Conversation Service - Single Turn."""
-import asyncio
 import os
 import sys
 import json
+import traceback
 
-# Add backend/src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# Add backend/src, and this directory for the shared runner helpers, to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
 
+from _async_runner import run_concurrently, run_main
 from services.llm_service import LLMService
 from services.conversation_service import ConversationService
 
+# Sample request payload, loaded once for all tests
+with open(os.path.join(os.path.dirname(__file__), "test_payload.json"), "r") as f:
+    TEST_PAYLOAD = json.load(f)
 
-async def test_single_turn():
+
+async def test_single_turn(conv_service: ConversationService):
     """Test generating a single-turn conversation."""
     print("Testing single-turn conversation generation...")
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("✗ OPENROUTER_API_KEY not set")
-        return False
-    
     try:
-        # Load test scenario
-        import os
-        test_dir = os.path.dirname(__file__)
-        with open(os.path.join(test_dir, "test_payload.json"), "r") as f:
-            payload = json.load(f)
-        
-        # Initialize services
-        llm_service = LLMService(api_key=api_key)
-        conv_service = ConversationService(llm_service)
-        
         # Generate conversation (single turn)
         conversation = await conv_service.generate_conversation(
-            scenario=payload["scenario"],
-            dispatcher_prompt=payload["dispatcherAgent"]["prompt"],
-            driver_prompt=payload["driverAgent"]["prompt"],
+            scenario=TEST_PAYLOAD["scenario"],
+            dispatcher_prompt=TEST_PAYLOAD["dispatcherAgent"]["prompt"],
+            driver_prompt=TEST_PAYLOAD["driverAgent"]["prompt"],
             max_turns=1
         )
         
@@ -61,24 +52,16 @@ async def test_single_turn():
     
     except Exception as e:
         print(f"✗ Error generating conversation: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
 
-async def test_scenario_formatting():
+async def test_scenario_formatting(conv_service: ConversationService):
     """Test scenario formatting."""
     print("Testing scenario formatting...")
     
     try:
-        with open("test_payload.json", "r") as f:
-            payload = json.load(f)
-        
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        llm_service = LLMService(api_key=api_key)
-        conv_service = ConversationService(llm_service)
-        
-        formatted = conv_service._format_scenario(payload["scenario"])
+        formatted = conv_service._format_scenario(TEST_PAYLOAD["scenario"])
         
         # Check that key elements are in formatted scenario
         required_elements = ["HDX-2478", "HVAC units", "42000", "Dallas TX", "Atlanta GA"]
@@ -99,15 +82,10 @@ async def test_scenario_formatting():
         return False
 
 
-async def test_with_custom_prompts():
+async def test_with_custom_prompts(conv_service: ConversationService):
     """Test with custom dispatcher prompts."""
     print("Testing with custom prompts...")
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        print("✗ OPENROUTER_API_KEY not set")
-        return False
-    
     try:
         # Simple test scenario
         scenario = {
@@ -127,9 +105,6 @@ async def test_with_custom_prompts():
             "tmsUpdate": "none"
         }
         
-        llm_service = LLMService(api_key=api_key)
-        conv_service = ConversationService(llm_service)
-        
         conversation = await conv_service.generate_conversation(
             scenario=scenario,
             dispatcher_prompt="You are a friendly dispatcher named Sarah.",
@@ -150,6 +125,7 @@ async def test_with_custom_prompts():
         return False
 
 
+
 async def main():
     """Run all tests."""
     print("=" * 60)
@@ -159,7 +135,7 @@ async def main():
     print("Prerequisites:")
     print("  1. Set OPENROUTER_API_KEY environment variable")
     print("  2. (Optional) Set LANGFUSE keys for tracing")
-    print("  3. Have test_payload.json in backend directory")
+    print("  3. Have test_payload.json in the tests directory")
     print()
     
     if not os.getenv("OPENROUTER_API_KEY"):
@@ -167,20 +143,19 @@ async def main():
         print()
         return
     
-    tests_passed = 0
     tests_total = 3
     
-    if await test_scenario_formatting():
-        tests_passed += 1
-    print()
-    
-    if await test_single_turn():
-        tests_passed += 1
-    print()
-    
-    if await test_with_custom_prompts():
-        tests_passed += 1
-    print()
+    # One service for all tests, so they share its pooled connections;
+    # the tests are independent, so their LLM round-trips overlap
+    conv_service = ConversationService(LLMService(api_key=os.getenv("OPENROUTER_API_KEY")))
+    try:
+        tests_passed = await run_concurrently(
+            test_scenario_formatting(conv_service),
+            test_single_turn(conv_service),
+            test_with_custom_prompts(conv_service),
+        )
+    finally:
+        await conv_service.aclose()
     
     print("=" * 60)
     print(f"Tests: {tests_passed}/{tests_total} passed")
@@ -197,5 +172,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
+    run_main(main)
@@ -1,29 +1,35 @@
 """Test script for Milestone 6: Conversation Service - Multi-Turn."""
-import requests
+import asyncio
 import json
+import os
+import re
 import sys
+import traceback
 
-def test_full_conversation():
+import httpx
+
+# Shared runner helpers live next to this script
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _async_runner import run_concurrently, run_main
+
+SERVER_URL = "http://localhost:8000"
+GENERATE_URL = f"{SERVER_URL}/api/v1/conversations/generate"
+
+# Phrases that mark a natural end of conversation, matched in one pass
+_CLOSING_RE = re.compile(r"thanks|bye|goodbye|talk soon|will do", re.IGNORECASE)
+
+# Sample request payload, loaded once for all tests
+with open(os.path.join(os.path.dirname(__file__), "test_payload.json"), "r") as f:
+    TEST_PAYLOAD = json.load(f)
+
+
+async def test_full_conversation(client: httpx.AsyncClient):
     """Test generating a full multi-turn conversation via API."""
     print("Testing full conversation generation via API...")
     
-    # Load test payload
     try:
-        import os
-        test_dir = os.path.dirname(__file__)
-        with open(os.path.join(test_dir, "test_payload.json"), "r") as f:
-            payload = json.load(f)
-    except FileNotFoundError:
-        print("✗ test_payload.json not found")
-        return False
-    
-    try:
-        response = requests.post(
-            "http://localhost:8000/api/v1/conversations/generate",
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=120  # Longer timeout for multi-turn generation
-        )
+        response = await client.post(GENERATE_URL, json=TEST_PAYLOAD)
         
         if response.status_code != 200:
             print(f"✗ HTTP error {response.status_code}")
@@ -43,41 +49,44 @@ def test_full_conversation():
             print(f"✗ Expected multi-turn conversation, got only {len(transcript)} turns")
             return False
         
-        # Check alternating speakers
-        for i, turn in enumerate(transcript):
-            expected_speaker = "Dispatcher" if i % 2 == 0 else "Driver"
-            if turn["speaker"] != expected_speaker:
-                print(f"✗ Turn {i}: expected {expected_speaker}, got {turn['speaker']}")
-                return False
+        # Check alternating speakers with one list comparison; walk the
+        # turns only to report the first mismatch
+        speakers = [turn["speaker"] for turn in transcript]
+        expected = ["Dispatcher", "Driver"] * (len(speakers) // 2) + ["Dispatcher"] * (len(speakers) % 2)
+        if speakers != expected:
+            i = next(i for i, (got, want) in enumerate(zip(speakers, expected)) if got != want)
+            print(f"✗ Turn {i}: expected {expected[i]}, got {speakers[i]}")
+            return False
         
         print(f"✓ Full conversation generated successfully")
         print(f"  Total turns: {len(transcript)}")
         print(f"  Conversation preview:")
         
-        for i, turn in enumerate(transcript[:6]):  # Show first 6 turns
-            preview = turn["text"][:60] + "..." if len(turn["text"]) > 60 else turn["text"]
-            print(f"    {turn['speaker']}: {preview}")
-        
+        # Build the preview (first 6 turns) and print it in one go
+        lines = [
+            f"    {turn['speaker']}: {turn['text'][:60]}{'...' if len(turn['text']) > 60 else ''}"
+            for turn in transcript[:6]
+        ]
         if len(transcript) > 6:
-            print(f"    ... ({len(transcript) - 6} more turns)")
+            lines.append(f"    ... ({len(transcript) - 6} more turns)")
+        print("\n".join(lines))
         
         return True
     
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("✗ Request timed out (conversation generation took too long)")
         return False
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("✗ Could not connect to server")
         print("  Make sure server is running: uvicorn src.api.main:app --reload")
         return False
     except Exception as e:
         print(f"✗ Error: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
 
-def test_conversation_completion():
+async def test_conversation_completion(client: httpx.AsyncClient):
     """Test that conversations end naturally."""
     print("Testing conversation completion logic...")
     
@@ -110,11 +119,7 @@ def test_conversation_completion():
     }
     
     try:
-        response = requests.post(
-            "http://localhost:8000/api/v1/conversations/generate",
-            json=payload,
-            timeout=120
-        )
+        response = await client.post(GENERATE_URL, json=payload)
         
         if response.status_code == 200:
             data = response.json()
@@ -123,11 +128,7 @@ def test_conversation_completion():
             print(f"✓ Conversation completed with {turns} turns")
             
             # Check if last turn contains ending phrase
-            last_text = data["transcript"][-1]["text"].lower()
-            ending_found = any(phrase in last_text for phrase in 
-                             ["thanks", "bye", "goodbye", "talk soon", "will do"])
-            
-            if ending_found:
+            if _CLOSING_RE.search(data["transcript"][-1]["text"]):
                 print("✓ Conversation ended naturally with closing phrase")
             else:
                 print("⚠ Last turn doesn't contain obvious closing phrase")
@@ -143,7 +144,21 @@ def test_conversation_completion():
         return False
 
 
-def main():
+
+async def wait_until_ready(client: httpx.AsyncClient, attempts: int = 60) -> bool:
+    """Poll the health endpoint every 0.5s until the server answers."""
+    for _ in range(attempts):
+        try:
+            response = await client.get(f"{SERVER_URL}/health", timeout=1)
+            if response.status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    return False
+
+
+async def main():
     """Run all tests."""
     print("=" * 60)
     print("Milestone 6: Conversation Service - Multi-Turn - Tests")
@@ -155,19 +170,22 @@ def main():
     print("  3. (Optional) LANGFUSE keys for observability")
     print()
     
-    input("Press Enter when server is ready...")
-    print()
-    
-    tests_passed = 0
     tests_total = 2
     
-    if test_full_conversation():
-        tests_passed += 1
-    print()
-    
-    if test_conversation_completion():
-        tests_passed += 1
-    print()
+    # Both requests run against the server at once over one client;
+    # multi-turn generation is slow, hence the long timeout
+    async with httpx.AsyncClient(timeout=120) as client:
+        # Wait for the server; this also opens a pooled connection, so the
+        # conversation requests don't pay for connection setup
+        if not await wait_until_ready(client):
+            print(f"✗ Server not ready at {SERVER_URL} after 30s")
+            print("  Make sure server is running: uvicorn src.api.main:app --reload")
+            sys.exit(1)
+        
+        tests_passed = await run_concurrently(
+            test_full_conversation(client),
+            test_conversation_completion(client),
+        )
     
     print("=" * 60)
     print(f"Tests: {tests_passed}/{tests_total} passed")
@@ -186,5 +204,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
-
+    run_main(main)